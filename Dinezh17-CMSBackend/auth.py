@@ -1,3 +1,7 @@
+from collections import OrderedDict
+import os
+import threading
+import time
 from typing import Dict
 from fastapi import APIRouter, Depends, Form, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
@@ -16,6 +20,39 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/logindev/")
 SECRET_KEY = "your_secret_key"
 ALGORITHM = "HS256"
 
+# users seen valid recently, so get_current_user can skip the users table
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 300))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+
+_user_cache: "OrderedDict[str, float]" = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
+def _is_cached_user(employee_number: str) -> bool:
+    """Whether the user was seen valid within the TTL."""
+    with _user_cache_lock:
+        expires_at = _user_cache.get(employee_number)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del _user_cache[employee_number]
+            return False
+        _user_cache.move_to_end(employee_number)
+        return True
+
+
+def _cache_user(employee_number: str) -> None:
+    with _user_cache_lock:
+        _user_cache[employee_number] = time.monotonic() + USER_CACHE_TTL_SECONDS
+        _user_cache.move_to_end(employee_number)
+        while len(_user_cache) > USER_CACHE_MAX_SIZE:
+            _user_cache.popitem(last=False)
+
+
+def invalidate_user(employee_number: str) -> None:
+    """Forget a cached user, call after the user is deleted or changed."""
+    with _user_cache_lock:
+        _user_cache.pop(employee_number, None)
 
 
 
@@ -156,9 +193,11 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         if username is None or role is None:
             raise HTTPException(status_code=401, detail="Invalid token data")
 
-        user = db.query(User).filter(User.employee_number == username).first()
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
+        if not _is_cached_user(username):
+            user = db.query(User).filter(User.employee_number == username).first()
+            if user is None:
+                raise HTTPException(status_code=401, detail="User not found")
+            _cache_user(username)
         
         return {"username": username, "role": role}
 
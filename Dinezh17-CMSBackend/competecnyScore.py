@@ -1,12 +1,15 @@
+from collections import Counter
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import and_
+from sqlalchemy import and_, func, update
 from sqlalchemy.orm import Session
 from typing import Dict, List
 from auth import get_current_user, hr_or_admin_required
+from competencyStats import refresh_competency_stats
 from database import get_db
 from models import Competency, Employee, EmployeeCompetency, Role, RoleCompetency
-from schemas import CompetencyScoreUpdate
+from responseCache import invalidate_employees
+from schemas import BatchEvaluationSubmission, CompetencyScoreUpdate, EvaluationSubmission
 
 
 
@@ -17,56 +20,179 @@ router = APIRouter()
 
 
 
+def _write_scores(db: Session, updates: Dict[int, int]) -> None:
+    """Set actual_score for employee competency ids in a single executemany UPDATE."""
+    if updates:
+        db.execute(
+            update(EmployeeCompetency),
+            [
+                {"employee_competencies_id": competency_id, "actual_score": actual_score}
+                for competency_id, actual_score in updates.items()
+            ]
+        )
+
+
+
+
+def _check_can_evaluate(current_user: dict, evaluator: Employee, employees: List[Employee]) -> None:
+    """Managers may only evaluate their direct reports, ADMIN and HOD may evaluate anyone."""
+    if current_user["role"] != "Manager":
+        return
+    not_reports = [
+        employee.employee_number for employee in employees
+        if employee.reporting_to != evaluator.employee_number
+    ]
+    if not_reports:
+        raise HTTPException(status_code=403, detail=f"Not your direct reports: {', '.join(not_reports)}")
+
+
+
+
+# registered before /evaluations/{employee_number} so "batch" is not taken as a number
+@router.post("/evaluations/batch")
+def submit_evaluation_batch(
+    batch: BatchEvaluationSubmission,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    role = current_user["role"]
+    if role not in ["ADMIN","HOD","Manager"]:
+        raise HTTPException(status_code=401, detail="No access")
+
+    employee_numbers = [evaluation.employee_number for evaluation in batch.evaluations]
+    if not employee_numbers:
+        raise HTTPException(status_code=400, detail="No evaluations submitted")
+    duplicates = sorted(number for number, count in Counter(employee_numbers).items() if count > 1)
+    if duplicates:
+        raise HTTPException(status_code=400, detail=f"Employees submitted more than once: {', '.join(duplicates)}")
+
+    people = {
+        person.employee_number: person
+        for person in db.query(Employee).filter(
+            Employee.employee_number.in_(employee_numbers + [current_user["username"]])
+        ).all()
+    }
+    evaluator = people.get(current_user["username"])
+    if not evaluator:
+        raise HTTPException(status_code=404, detail="Evaluator not found")
+
+    missing = [number for number in employee_numbers if number not in people]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Employees not found: {', '.join(missing)}")
+
+    _check_can_evaluate(current_user, evaluator, [people[number] for number in employee_numbers])
+
+    # every competency row of the batch, validated before anything is written
+    competency_ids = {
+        (row.employee_number, row.competency_code): row.employee_competencies_id
+        for row in db.query(
+            EmployeeCompetency.employee_number,
+            EmployeeCompetency.competency_code,
+            EmployeeCompetency.employee_competencies_id
+        ).filter(EmployeeCompetency.employee_number.in_(employee_numbers)).all()
+    }
+    updates = {}
+    scores_per_employee = {}
+    unknown = {}
+    for evaluation in batch.evaluations:
+        scores_per_employee[evaluation.employee_number] = 0
+        for score in evaluation.scores:
+            competency_id = competency_ids.get((evaluation.employee_number, score.competency_code))
+            if competency_id is None:
+                unknown.setdefault(evaluation.employee_number, []).append(score.competency_code)
+            else:
+                updates[competency_id] = score.actual_score
+                scores_per_employee[evaluation.employee_number] += 1
+    if unknown:
+        # the batch is all or nothing, name every employee and code that stopped it
+        raise HTTPException(
+            status_code=400,
+            detail="Competencies not assigned: " + "; ".join(
+                f"{number}: {', '.join(codes)}" for number, codes in unknown.items()
+            )
+        )
+
+    _write_scores(db, updates)
+    db.execute(
+        update(Employee)
+        .where(Employee.employee_number.in_(employee_numbers))
+        .values(
+            evaluation_status="True",
+            evaluation_by=evaluator.employee_name,
+            last_evaluated_date=datetime.utcnow()
+        )
+    )
+    refresh_competency_stats(db, {(people[number].department_id, people[number].reporting_to) for number in employee_numbers})
+    db.commit()
+    invalidate_employees(employee_numbers)
+
+    pending = db.query(func.count(Employee.employee_number)).filter(
+        Employee.reporting_to == current_user["username"],
+        Employee.evaluation_status == "False"
+    ).scalar()
+
+    return {
+        "message": "Evaluations submitted successfully",
+        "evaluated": len(employee_numbers),
+        "scores_updated": len(updates),
+        "results": [
+            {"employee_number": number, "scores_updated": count}
+            for number, count in scores_per_employee.items()
+        ],
+        "pending": pending
+    }
+
+
+
+
 @router.post("/evaluations/{employee_number}")
 def submit_evaluation(
     employee_number: str,
-    evaluation_data: dict,
+    evaluation_data: EvaluationSubmission,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
     role =current_user["role"] 
     if role not in ["ADMIN","HOD","Manager"]:
         raise HTTPException(status_code=401, detail="No access")   
-    # Validate input
-    if "scores" not in evaluation_data:
-        raise HTTPException(status_code=400, detail="Invalid evaluation data format")
-    
-   
-    # Check if employee exists
-    employee = db.query(Employee).filter(Employee.employee_number == employee_number).first()
+
+    # employee and evaluator in one query
+    people = {
+        person.employee_number: person
+        for person in db.query(Employee).filter(
+            Employee.employee_number.in_([employee_number, current_user["username"]])
+        ).all()
+    }
+    employee = people.get(employee_number)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    
-    # Process each competency score
-    for score in evaluation_data["scores"]:
-        has_competency_code = "competency_code" in score
-        has_actual_score = "actual_score" in score
-
-        if not (has_competency_code and has_actual_score):
-            continue
-            
-        # Update    competency record
-        competency = db.query(EmployeeCompetency).filter(
-            EmployeeCompetency.employee_number == employee_number,
-            EmployeeCompetency.competency_code == score["competency_code"]
-        ).first()
-        
-        if competency:
-            # Update existing record
-            competency.actual_score = score["actual_score"]
-
-    evaluator_id=db.query(Employee).filter(Employee.employee_number==current_user["username"]).first()
+
+    evaluator_id = people.get(current_user["username"])
     if not evaluator_id:
         raise HTTPException(status_code=404, detail="Evaluator not found")
-    
-
+    _check_can_evaluate(current_user, evaluator_id, [employee])
+
+    # competency rows of the employee keyed by code, scores for other codes are ignored
+    competency_ids = dict(
+        db.query(EmployeeCompetency.competency_code, EmployeeCompetency.employee_competencies_id)
+        .filter(EmployeeCompetency.employee_number == employee_number)
+        .all()
+    )
+    updates = {
+        competency_ids[score.competency_code]: score.actual_score
+        for score in evaluation_data.scores
+        if score.competency_code in competency_ids
+    }
+    _write_scores(db, updates)
 
     employee.evaluation_status = "True"
     employee.evaluation_by = evaluator_id.employee_name
     employee.last_evaluated_date = datetime.utcnow()
+    refresh_competency_stats(db, {(employee.department_id, employee.reporting_to)})
     db.commit()
+    invalidate_employees([employee_number])
 
-    res = db.query(Employee.employee_number).filter(and_(Employee.reporting_to == evaluator_id.employee_number,Employee.evaluation_status=="False")).all()
+    res = db.query(Employee.employee_number).filter(and_(Employee.reporting_to == current_user["username"],Employee.evaluation_status=="False")).all()
 
     if not res:
         print ("all the evaluations of my team members are done from -" ,evaluator_id.employee_name )
@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 from typing import Dict, List
 from auth import get_current_user, hr_or_admin_required
 from database import get_db
-from models import Competency, EmployeeCompetency
+from models import Competency, CompetencyStats, EmployeeCompetency
+from responseCache import invalidate_all
 from schemas import CompetencyCreate, CompetencyResponse
 from typing import List, Optional
 from fastapi import  Depends, HTTPException, APIRouter
@@ -81,6 +82,7 @@ def update_competency(
     db_competency.competency_description = competency.competency_description.strip()
 
     db.commit()
+    invalidate_all()
     db.refresh(db_competency)
     
     return db_competency
@@ -112,7 +114,10 @@ def delete_competency(
         )
     
     db.delete(competency)
+    # no employee holds it any more, only leftover rollup rows can still name it
+    db.query(CompetencyStats).filter(CompetencyStats.competency_code == competency_code).delete(synchronize_session=False)
     db.commit()
+    invalidate_all()
     return {"message": "Competency deleted successfully"}
 
 
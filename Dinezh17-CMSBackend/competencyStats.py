@@ -0,0 +1,129 @@
+from typing import Dict, Iterable, Set, Tuple
+from fastapi import APIRouter, Depends
+from sqlalchemy import and_, case, func, insert, select
+from sqlalchemy.orm import Session
+from auth import hr_or_admin_required
+from database import SessionLocal, get_db
+from models import CompetencyStats, Employee, EmployeeCompetency
+
+router = APIRouter()
+
+
+# a slice is one (department_id, reporting_to) pair, the rollup is kept per
+# competency inside every slice so dashboards never scan employee_competencies
+
+STATS_COLUMNS = [
+    CompetencyStats.competency_code,
+    CompetencyStats.department_id,
+    CompetencyStats.manager_number,
+    CompetencyStats.total_count,
+    CompetencyStats.required_count,
+    CompetencyStats.required_sum,
+    CompetencyStats.actual_count,
+    CompetencyStats.actual_sum,
+    CompetencyStats.meeting_required,
+    CompetencyStats.gap1,
+    CompetencyStats.gap2,
+    CompetencyStats.gap3,
+    CompetencyStats.gap4,
+]
+
+
+def _rollup_select(*criteria):
+    """Aggregate employee competencies per competency x department x manager."""
+    gap = EmployeeCompetency.required_score - EmployeeCompetency.actual_score
+    evaluated = Employee.evaluation_status == "True"
+
+    def gap_bucket(size):
+        return func.sum(case((and_(evaluated, gap == size), 1), else_=0))
+
+    return (
+        select(
+            EmployeeCompetency.competency_code,
+            Employee.department_id,
+            Employee.reporting_to,
+            func.count(EmployeeCompetency.employee_competencies_id),
+            func.count(EmployeeCompetency.required_score),
+            func.coalesce(func.sum(EmployeeCompetency.required_score), 0),
+            func.count(EmployeeCompetency.actual_score),
+            func.coalesce(func.sum(EmployeeCompetency.actual_score), 0),
+            func.sum(
+                case(
+                    (EmployeeCompetency.actual_score >= EmployeeCompetency.required_score, 1),
+                    else_=0
+                )
+            ),
+            gap_bucket(1),
+            gap_bucket(2),
+            gap_bucket(3),
+            gap_bucket(4),
+        )
+        .join(Employee, Employee.employee_number == EmployeeCompetency.employee_number)
+        .where(*criteria)
+        .group_by(
+            EmployeeCompetency.competency_code,
+            Employee.department_id,
+            Employee.reporting_to
+        )
+    )
+
+
+def employee_stats_slices(db: Session, *criteria) -> Set[Tuple]:
+    """Return the (department_id, reporting_to) slices of the matching employees."""
+    rows = db.query(Employee.department_id, Employee.reporting_to).filter(*criteria).distinct().all()
+    return {(row.department_id, row.reporting_to) for row in rows}
+
+
+def refresh_competency_stats(db: Session, slices: Iterable[Tuple]) -> None:
+    """Recompute the rollup rows of the given slices inside the caller's transaction."""
+    # pending ORM changes must be visible to the INSERT ... SELECT below
+    db.flush()
+    for department_id, manager_number in set(slices):
+        db.query(CompetencyStats).filter(
+            CompetencyStats.department_id == department_id,
+            CompetencyStats.manager_number == manager_number
+        ).delete(synchronize_session=False)
+
+        db.execute(
+            insert(CompetencyStats).from_select(
+                STATS_COLUMNS,
+                _rollup_select(
+                    Employee.department_id == department_id,
+                    Employee.reporting_to == manager_number
+                )
+            )
+        )
+
+
+def rebuild_competency_stats(db: Session) -> Dict[str, int]:
+    """Drop and rebuild the whole rollup from employee_competencies."""
+    db.query(CompetencyStats).delete(synchronize_session=False)
+    db.execute(insert(CompetencyStats).from_select(STATS_COLUMNS, _rollup_select()))
+    db.commit()
+    return {"rows": db.query(CompetencyStats).count()}
+
+
+def ensure_competency_stats(db: Session) -> None:
+    """Build the rollup once for databases created before it existed."""
+    if db.query(CompetencyStats.id).first() is None and db.query(EmployeeCompetency.employee_competencies_id).first() is not None:
+        rebuild_competency_stats(db)
+
+
+
+
+@router.post("/stats/rebuild")
+def rebuild_stats(db: Session = Depends(get_db), current_user: dict = Depends(hr_or_admin_required)):
+    return rebuild_competency_stats(db)
+
+
+
+
+# drift repair from the command line:  python competencyStats.py
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        from migrations import run_migrations
+        run_migrations(db.get_bind())
+        print("competency_stats rebuilt:", rebuild_competency_stats(db))
+    finally:
+        db.close()
@@ -0,0 +1,90 @@
+from typing import Dict, Iterable
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+from models import EmployeeCompetency, RoleCompetency
+
+
+# employee competencies are reconciled against a target {competency_code: required_score}
+# by diffing, so only the delta is written and actual_score survives on
+# competencies the employee keeps
+
+IN_CHUNK_SIZE = 500
+
+
+def load_competency_rows(db: Session, employee_numbers: Iterable[str]) -> Dict[str, Dict[str, dict]]:
+    """Return {employee_number: {competency_code: {"id", "required_score"}}} for the employees."""
+    numbers = list(set(employee_numbers))
+    rows = {number: {} for number in numbers}
+    for start in range(0, len(numbers), IN_CHUNK_SIZE):
+        for row in db.query(
+            EmployeeCompetency.employee_competencies_id,
+            EmployeeCompetency.employee_number,
+            EmployeeCompetency.competency_code,
+            EmployeeCompetency.required_score
+        ).filter(EmployeeCompetency.employee_number.in_(numbers[start:start + IN_CHUNK_SIZE])).all():
+            rows[row.employee_number][row.competency_code] = {
+                "id": row.employee_competencies_id,
+                "required_score": row.required_score,
+            }
+    return rows
+
+
+def role_competency_scores(db: Session, role_id: int) -> Dict[str, int]:
+    """Return the {competency_code: required_score} target of a role."""
+    return dict(
+        db.query(RoleCompetency.competency_code, RoleCompetency.role_competency_required_score)
+        .filter(RoleCompetency.role_id == role_id)
+        .all()
+    )
+
+
+def diff_competencies(current: Dict[str, dict], target: Dict[str, int], remove: bool = True) -> dict:
+    """Compare current rows with the target.
+
+    Returns added {code: score}, changed {id: score} and removed [id]; rows
+    missing from the target are only removed when remove is set.
+    """
+    added = {code: score for code, score in target.items() if code not in current}
+    changed = {
+        current[code]["id"]: score
+        for code, score in target.items()
+        if code in current and current[code]["required_score"] != score
+    }
+    removed = [row["id"] for code, row in current.items() if code not in target] if remove else []
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+def apply_competency_diffs(db: Session, diffs: Dict[str, dict]) -> Dict[str, int]:
+    """Write {employee_number: diff} with one statement per kind of change, without committing."""
+    inserts = [
+        {"employee_number": number, "competency_code": code, "required_score": score, "actual_score": 0}
+        for number, diff in diffs.items()
+        for code, score in diff["added"].items()
+    ]
+    updates = [
+        {"employee_competencies_id": ec_id, "required_score": score}
+        for diff in diffs.values()
+        for ec_id, score in diff["changed"].items()
+    ]
+    removed = [ec_id for diff in diffs.values() for ec_id in diff["removed"]]
+
+    if removed:
+        for start in range(0, len(removed), IN_CHUNK_SIZE):
+            db.execute(
+                delete(EmployeeCompetency)
+                .where(EmployeeCompetency.employee_competencies_id.in_(removed[start:start + IN_CHUNK_SIZE]))
+                .execution_options(synchronize_session=False)
+            )
+    if inserts:
+        db.execute(insert(EmployeeCompetency), inserts)
+    if updates:
+        db.execute(update(EmployeeCompetency), updates)
+
+    return {"added": len(inserts), "changed": len(updates), "removed": len(removed)}
+
+
+def reconcile_employee_competencies(db: Session, employee_number: str, role_id: int) -> Dict[str, int]:
+    """Bring an employee's competencies in line with role_id, keeping scores on overlapping ones."""
+    current = load_competency_rows(db, [employee_number])[employee_number]
+    diff = diff_competencies(current, role_competency_scores(db, role_id))
+    return apply_competency_diffs(db, {employee_number: diff})
@@ -2,9 +2,10 @@ from typing import Dict, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from auth import get_current_user, hr_or_admin_required
-from models import Department, DepartmentRole, Employee, BusinessDivision
+from models import CompetencyStats, Department, DepartmentRole, Employee, BusinessDivision
 from schemas import DepartmentBase, DepartmentResponse
 from database import get_db
+from responseCache import invalidate_all
 
 router = APIRouter()
 # tested
@@ -81,6 +82,7 @@ def update_department(department_id: int, department_data: DepartmentBase,
 
     department.name = department_data.name.strip()
     db.commit()
+    invalidate_all()
     db.refresh(department)
 
     return department
@@ -115,6 +117,9 @@ def delete_department(department_id: int, db: Session = Depends(get_db),
             detail="to delete department role are still Assigned to this departments"
         )
     db.delete(department)
+    # no employee is left in it, only leftover rollup rows can still name it
+    db.query(CompetencyStats).filter(CompetencyStats.department_id == department_id).delete(synchronize_session=False)
     db.commit()
+    invalidate_all()
 
     return {"message": "Department deleted successfully"} 
\ No newline at end of file
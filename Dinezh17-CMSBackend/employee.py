@@ -3,10 +3,14 @@ from pydantic import BaseModel
 from sqlalchemy import  and_
 from sqlalchemy.orm import Session
 from typing import Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from auth import get_current_user, hr_or_admin_required
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from auth import get_current_user, hr_or_admin_required, invalidate_user
+from competencyStats import refresh_competency_stats
+from competencySync import reconcile_employee_competencies
 from database import get_db
+from job import occupy_job, release_jobs
 from models import Department, DepartmentRole, Employee, EmployeeCompetency, Role, RoleCompetency, RoleJob, User
+from responseCache import invalidate_employees
 from schemas import EmployeeCreate, EmployeeCreateResponse, EmployeeResponse, ManagerResponse
 from security import get_password_hash
 
@@ -18,24 +22,65 @@ router = APIRouter()
 
 
 
-@router.get("/employees/", response_model=List[EmployeeResponse])
-def get_employees(db: Session = Depends(get_db), current_user: Dict = Depends(get_current_user)):
-   
+# only the columns EmployeeResponse needs
+EMPLOYEE_LIST_COLUMNS = [
+    Employee.employee_number,
+    Employee.employee_name,
+    Employee.job_code,
+    RoleJob.job_name,
+    Employee.reporting_to,
+    Employee.role_id,
+    Employee.department_id,
+    Employee.sent_to_evaluation_by,
+    Employee.evaluation_status,
+    Employee.evaluation_by,
+    Employee.last_evaluated_date,
+]
 
-    results = (
-        db.query(Employee, RoleJob.job_name)
+
+@router.get("/employees/", response_model=List[EmployeeResponse])
+def get_employees(
+    response: Response,
+    department_id: Optional[int] = Query(None),
+    role_id: Optional[int] = Query(None),
+    reporting_to: Optional[str] = Query(None),
+    evaluation_status: Optional[str] = Query(None),
+    name_prefix: Optional[str] = Query(None),
+    after: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: Dict = Depends(get_current_user)
+):
+    # without after/limit the whole list is returned as before; with them the
+    # list is ordered by employee_number and X-Next-Cursor names the next page
+    query = (
+        db.query(*EMPLOYEE_LIST_COLUMNS)
         .join(RoleJob, Employee.job_code == RoleJob.job_code)
         .filter(Employee.employee_number != "100000000")
-        .all()
     )
+    if department_id is not None:
+        query = query.filter(Employee.department_id == department_id)
+    if role_id is not None:
+        query = query.filter(Employee.role_id == role_id)
+    if reporting_to is not None:
+        query = query.filter(Employee.reporting_to == reporting_to)
+    if evaluation_status is not None:
+        query = query.filter(Employee.evaluation_status == evaluation_status)
+    if name_prefix:
+        query = query.filter(Employee.employee_name.startswith(name_prefix, autoescape=True))
+
+    if after is not None or limit is not None:
+        query = query.order_by(Employee.employee_number)
+        if after is not None:
+            query = query.filter(Employee.employee_number > after)
+        if limit is not None:
+            query = query.limit(limit)
 
-    response = []
-    for emp, job_name in results:
-        emp_data = emp.__dict__.copy()
-        emp_data["job_name"] = job_name
-        response.append(EmployeeResponse(**emp_data))
+    results = query.all()
+    if limit is not None and len(results) == limit:
+        response.headers["X-Next-Cursor"] = results[-1].employee_number
 
-    return response
+    return [row._asdict() for row in results]
 
 
 
@@ -103,6 +148,10 @@ def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db),curr
         manager = manager_query.first()
         if not manager:
             raise HTTPException(status_code=404, detail="Reporting manager not found or not a manager")
+
+    # Take the job in the same transaction as the insert
+    if not occupy_job(db, employee.job_code, employee.employee_number.strip()):
+        raise HTTPException(status_code=400, detail=f"Job code '{employee.job_code}' is not available")
     
     # Create employee
     try:
@@ -137,6 +186,7 @@ def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db),curr
 
       
         db.add_all(employee_competencies)
+        refresh_competency_stats(db, {(db_employee.department_id, db_employee.reporting_to)})
         db.commit()
         db_user = User(
             employee_number=employee.employee_number,
@@ -206,9 +256,15 @@ def update_employee(employee_number: str, employee_update: EmployeeCreate, db: S
         manager = manager_query.first()
         if not manager:
             raise HTTPException(status_code=404, detail="Reporting manager not found or not a manager")
+
+    # Move the job with the employee, also when the employee number changes
+    release_jobs(db, [employee_number])
+    if not occupy_job(db, employee_update.job_code, employee_update.employee_number.strip()):
+        raise HTTPException(status_code=400, detail=f"Job code '{employee_update.job_code}' is not available")
     
     try:
         role_changed = employee_update.role_id and employee_update.role_id != db_employee.role_id
+        stats_slices = {(db_employee.department_id, db_employee.reporting_to)}
 
         db_employee.employee_number = employee_update.employee_number.strip()
         db_employee.employee_name = employee_update.employee_name.strip()
@@ -217,29 +273,21 @@ def update_employee(employee_number: str, employee_update: EmployeeCreate, db: S
         db_employee.reporting_to = employee_update.reporting_to
         db_employee.role_id = employee_update.role_id
         db_employee.department_id = employee_update.department_id
-        db.commit()
-        db.refresh(db_employee)
+        db.flush()
 
-        # If role changed, flush existing competencies
+        # If role changed, apply only the competency delta so shared scores are kept
         if role_changed:
-            db.query(EmployeeCompetency).filter(EmployeeCompetency.employee_number == employee_number).delete()
-            db.commit()
+            reconcile_employee_competencies(db, employee_number, employee_update.role_id)
 
-            # Assign new competencies based on the updated role
-            role_competencies = db.query(RoleCompetency).filter(RoleCompetency.role_id == employee_update.role_id).all()
-
-            new_employee_competencies = [
-                EmployeeCompetency(
-                    employee_number=employee_number,
-                    competency_code=comp.competency_code,
-                    required_score=comp.role_competency_required_score,
-                    actual_score=0
-                )
-                for comp in role_competencies
-            ]
+        stats_slices.add((db_employee.department_id, db_employee.reporting_to))
+        refresh_competency_stats(db, stats_slices)
+        db.commit()
 
-            db.add_all(new_employee_competencies)
-            db.commit()
+        # direct reports show this employee's name on their detail pages
+        renamed = {employee_number, db_employee.employee_number}
+        reports = db.query(Employee.employee_number).filter(Employee.reporting_to.in_(renamed)).all()
+        invalidate_employees(renamed | {r.employee_number for r in reports})
+        db.refresh(db_employee)
 
         return db_employee
     
@@ -269,10 +317,14 @@ def delete_employee(employee_number: str, db: Session = Depends(get_db),current_
     
 
     db.query(User).filter(User.employee_number == employee_number).delete()
+    release_jobs(db, [employee_number])
     db.query(EmployeeCompetency).filter(EmployeeCompetency.employee_number == employee_number).delete()
+    refresh_competency_stats(db, {(db_employee.department_id, db_employee.reporting_to)})
     db.commit()
     db.delete(db_employee)
     db.commit()
+    invalidate_user(employee_number)
+    invalidate_employees([employee_number])
     return None
 
 
@@ -309,6 +361,7 @@ def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
     
     existing_user.role=user_data.role
     db.commit()
+    invalidate_user(existing_user.employee_number)
     db.refresh(existing_user)
     return existing_user
    
\ No newline at end of file
@@ -1,8 +1,11 @@
 from typing import List
 from auth import get_current_user, hr_or_admin_required
+from competencyStats import refresh_competency_stats
+from competencySync import apply_competency_diffs, diff_competencies, load_competency_rows
 from database import get_db
 from fastapi import APIRouter, Depends, HTTPException
 from models import Competency, Employee, EmployeeCompetency
+from responseCache import invalidate_employees
 from sqlalchemy.orm import Session
 
 from schemas import  EmpCompetencyScoreUpdate
@@ -25,13 +28,10 @@ def assign_competencies_to_employee(
         raise HTTPException(status_code=404, detail="Employee not found")
 
     # 2. Check for existing assignments
-    existing_assignments = db.query(EmployeeCompetency.competency_code).filter(
-        EmployeeCompetency.employee_number == employee_number
-    ).all()
-    existing_codes = {e.competency_code for e in existing_assignments}
+    current = load_competency_rows(db, [employee_number])[employee_number]
 
     # 3. Filter new competencies
-    new_codes = set(competency_codes) - existing_codes
+    new_codes = set(competency_codes) - set(current)
     if not new_codes:
         return []
 
@@ -44,14 +44,12 @@ def assign_competencies_to_employee(
         raise HTTPException(status_code=404, detail=f"Competencies not found: {missing}")
 
     # 5. Assign new competencies
-    for code in new_codes:
-        db.add(EmployeeCompetency(
-            employee_number=employee_number,
-            competency_code=code,
-            required_score=3,
-            actual_score=0
-        ))
+    apply_competency_diffs(db, {
+        employee_number: diff_competencies(current, {code: 3 for code in new_codes}, remove=False)
+    })
+    refresh_competency_stats(db, {(employee.department_id, employee.reporting_to)})
     db.commit()
+    invalidate_employees([employee_number])
 
     return list(new_codes)
 
@@ -81,7 +79,9 @@ def remove_competencies_from_employee(
     if deleted == 0:
         raise HTTPException(status_code=404, detail="No matching competencies found")
 
+    refresh_competency_stats(db, {(employee.department_id, employee.reporting_to)})
     db.commit()
+    invalidate_employees([employee_number])
     return competency_codes
 
 
@@ -101,20 +101,22 @@ def update_employee_competency_scores(
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
-    updated_count = 0
-    for update in competency_updates:
-        ec = db.query(EmployeeCompetency).filter(
-            EmployeeCompetency.employee_number == employee_number,
-            EmployeeCompetency.competency_code == update.competency_code
-        ).first()
-        if ec:
-            ec.required_score = update.required_score
-            updated_count += 1
+    # only competencies the employee already has are rescored
+    current = load_competency_rows(db, [employee_number])[employee_number]
+    matched = [update for update in competency_updates if update.competency_code in current]
+    updated_count = len(matched)
+    apply_competency_diffs(db, {
+        employee_number: diff_competencies(
+            current, {update.competency_code: update.required_score for update in matched}, remove=False
+        )
+    })
 
     if updated_count == 0:
         raise HTTPException(status_code=404, detail="No matching competencies found")
 
+    refresh_competency_stats(db, {(employee.department_id, employee.reporting_to)})
     db.commit()
+    invalidate_employees([employee_number])
     return {"message": f"Updated actual scores for {updated_count} competencies"}
 
 
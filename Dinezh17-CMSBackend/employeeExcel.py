@@ -1,20 +1,24 @@
-from typing import Dict, List
-import pandas as pd
-import re
+from concurrent.futures import ProcessPoolExecutor
+import math
+import multiprocessing
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from io import BytesIO
+from openpyxl import load_workbook
+from sqlalchemy import bindparam, insert, or_, update
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from passlib.context import CryptContext
-from datetime import datetime
  
-from auth import hr_or_admin_required
-from models import Employee, Department, Role, Competency, DepartmentRole, RoleCompetency, EmployeeCompetency, RoleJob, User
-from security import get_password_hash
+from auth import invalidate_user
+from competencyStats import refresh_competency_stats
+from competencySync import apply_competency_diffs, diff_competencies, load_competency_rows
+from job import DUMMY_JOB_CODE, refresh_job_summary, release_jobs
+from models import Employee, Department, Role, Competency, RoleJob, User
+from responseCache import invalidate_all
+from security import get_password_hashes
 
 
-def parse_employee_data_from_csv_lines(csv_lines: List[str]) -> Dict:
-    """Parse employee data from CSV-formatted lines extracted from Excel."""
-    words = []
+def parse_employee_data_from_words(words: List[str]) -> Dict:
+    """Parse employee data from the cell word stream of one Excel sheet."""
     current_employee = {
         "EmployeeNumber": "",
         "EmployeeName": "",
@@ -27,22 +31,6 @@ def parse_employee_data_from_csv_lines(csv_lines: List[str]) -> Dict:
     in_competencies_section = False
     rpl_apl_count = 0
     
-    # Extract all words first
-    for line in csv_lines:
-        line = line.strip()
-        if not line:
-            continue
-        
-        raw_parts = line.split(',')
-        line_words = []
-        
-        for part in raw_parts:
-            stripped_word = part.strip()
-            if stripped_word:
-                line_words.append(stripped_word)
-        
-        words.extend(line_words)
-
     i = 0
     while i < len(words):
         try:
@@ -121,390 +109,406 @@ def parse_employee_data_from_csv_lines(csv_lines: List[str]) -> Dict:
   
  
 
-def convert_excel_sheet_to_csv_lines(df: pd.DataFrame) -> List[str]:
-    """Convert an Excel sheet DataFrame to cleaned CSV lines for parsing."""
-    csv_lines = []
-    for row in df.values:
-        if any("managing points" in str(cell).strip().lower() for cell in row if pd.notna(cell)):
-            return csv_lines
-             
-        clean_row = [str(cell).strip().replace(',', '/') if pd.notna(cell) else "" for cell in row]
-        
-        cleaned = []
-        prev_empty = False
-        for cell in clean_row:
-            if cell == "":
-                if not prev_empty:
-                    cleaned.append(cell)
-                prev_empty = True
-            else:
-                cleaned.append(cell)
-                prev_empty = False
-        
-        csv_line = ",".join([cell for cell in cleaned if cell != ""]) + ","
-        csv_line = re.sub(r',,+', ',', csv_line)
-        
-        if csv_line.strip(','):
-            csv_lines.append(csv_line + "\n")
-    return csv_lines
-
-def check_department_exists(db: Session, department_name: str) -> Department:
-    """Check if a department exists by name."""
-    return db.query(Department).filter(Department.name == department_name).first()
- 
-   
-def check_role_exists(db: Session, role_code: str) -> Role:
-    """Check if a role exists by role_code."""
-    return db.query(Role).filter(Role.role_code == role_code).first()
-  
+def iter_sheet_words(worksheet) -> Iterator[str]:
+    """Yield the non-empty cell values of a sheet row by row, stopping at the "managing points" row."""
+    for row in worksheet.iter_rows(values_only=True):
+        words = []
+        for cell in row:
+            if cell is None:
+                continue
+            # whole numbers are stored as floats by Excel, read them as ints
+            if isinstance(cell, float) and cell.is_integer():
+                cell = int(cell)
+            word = str(cell).strip()
+            if "managing points" in word.lower():
+                return
+            word = word.replace(',', '/').strip()
+            if word:
+                words.append(word)
+        yield from words
+
+
+# sheet parsing is CPU bound, it is fanned out to this many worker processes
+IMPORT_PARSE_WORKERS = int(os.getenv("IMPORT_PARSE_WORKERS", os.cpu_count() or 1))
+# below this many sheets per worker a process pool costs more than it saves
+MIN_SHEETS_PER_PARSE_WORKER = 25
+
+# lookups are resolved with IN (...) queries in chunks to stay under the
+# driver's bound parameter limit
+IMPORT_CHUNK_SIZE = 500
+
+DUMMY_MANAGER_JOB_CODE = DUMMY_JOB_CODE
+DUMMY_MANAGER_REPORTING_TO = "100000000"
+DUMMY_MANAGER_ROLE_ID = 100
+DUMMY_MANAGER_DEPARTMENT_ID = 100
+
+
+def _chunked(values: Iterable, size: int = IMPORT_CHUNK_SIZE) -> Iterable[List]:
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _query_in(db: Session, columns: list, key_column, keys: Iterable, *criteria) -> list:
+    """Run one projected IN (...) query per chunk of keys and return all rows."""
+    rows = []
+    for chunk in _chunked(set(keys)):
+        rows.extend(db.query(*columns).filter(key_column.in_(chunk), *criteria).all())
+    return rows
+
+
+def load_import_lookups(db: Session, employees: List[dict]) -> dict:
+    """Resolve every department, role, job, competency, employee and user the batch refers to."""
+    employee_numbers = {e["EmployeeNumber"] for e in employees}
+    reporting_numbers = {e["ReportingNumber"] for e in employees if e["ReportingNumber"]}
+    people = employee_numbers | reporting_numbers
+    job_codes = {e["JobCode"] for e in employees}
+
+    departments = {
+        row.name: row.id
+        for row in _query_in(db, [Department.id, Department.name], Department.name,
+                             {e["Department"] for e in employees})
+    }
+    roles = {
+        row.role_code: row.id
+        for row in _query_in(db, [Role.id, Role.role_code], Role.role_code,
+                             {e["RoleCode"] for e in employees})
+    }
+    # job status and occupancy straight from role_job, no scan of employees
+    jobs = _query_in(
+        db, [RoleJob.job_code, RoleJob.role_code, RoleJob.job_status, RoleJob.occupied_by], RoleJob.job_code, job_codes
+    )
+    active_jobs = {row.job_code for row in jobs if row.job_status}
+    job_roles = {row.job_code: row.role_code for row in jobs}
+    job_holders = {row.job_code: {row.occupied_by} for row in jobs if row.occupied_by}
+    competencies = {
+        row.competency_code
+        for row in _query_in(db, [Competency.competency_code], Competency.competency_code,
+                             {c["Code"] for e in employees for c in e["Competencies"]})
+    }
 
+    known_employees = {
+        row.employee_number: {
+            "employee_number": row.employee_number,
+            "job_code": row.job_code,
+            "reporting_to": row.reporting_to,
+            "department_id": row.department_id,
+        }
+        for row in _query_in(
+            db,
+            [Employee.employee_number, Employee.job_code, Employee.reporting_to, Employee.department_id],
+            Employee.employee_number, people
+        )
+    }
 
+    # employees that already have direct reports become managers when created
+    managers_in_db = {
+        row.reporting_to
+        for row in _query_in(db, [Employee.reporting_to], Employee.reporting_to, employee_numbers)
+    }
 
-def check_job_code_exists(db: Session, job_code: str) -> RoleJob:
-    """Check if a job code exists in the RoleJob table."""
-    return db.query(RoleJob).filter(RoleJob.job_code == job_code,RoleJob.job_status==True).first()
+    users = {
+        row.employee_number: {"id": row.id, "role": row.role}
+        for row in _query_in(db, [User.id, User.employee_number, User.role], User.employee_number, people)
+    }
+    taken_emails = {
+        row.email
+        for row in _query_in(db, [User.email], User.email, {f"{number}@company.com" for number in people})
+    }
 
+    employee_competencies = load_competency_rows(db, employee_numbers)
 
-def check_competency_exists(db: Session, competency_code: str) -> Competency:
-    """Check if a competency exists by competency_code."""
-    return db.query(Competency).filter(Competency.competency_code == competency_code).first()
+    return {
+        "departments": departments,
+        "roles": roles,
+        "active_jobs": active_jobs,
+        "competencies": competencies,
+        "known_employees": known_employees,
+        "job_holders": job_holders,
+        "job_roles": job_roles,
+        "managers_in_db": managers_in_db,
+        "users": users,
+        "taken_emails": taken_emails,
+        "employee_competencies": employee_competencies,
+    }
 
-# def ensure_department_role_link(db: Session, department_id: int, role_id: int) -> None:
-#     """Ensure there's a link between department and role."""
-#     link = db.query(DepartmentRole).filter(
-#         DepartmentRole.department_id == department_id,
-#         DepartmentRole.role_id == role_id
-#     ).first()
-    
-#     if not link:
-#         link = DepartmentRole(department_id=department_id, role_id=role_id)
-#         db.add(link)
-#         db.commit()
 
+def validate_employee_data(lookups: dict, employee_data: dict) -> Optional[str]:
+    """Return the failure reason for an employee sheet, or None when it can be imported."""
+    if employee_data["Department"] not in lookups["departments"]:
+        return f"Department '{employee_data['Department']}' does not exist"
 
-
-def process_employee_data(db: Session, employee_data: dict) -> dict:
-    """Process employee data and determine if it can be successfully created/updated."""
-    employee_number = employee_data["EmployeeNumber"]
-    result = {
-        "employee_number": employee_number,
-        "employee_name": employee_data["EmployeeName"],
-        "status": "processed",
-        "failure_reason": None
-    }
-    
-    # Check if department exists
-    department = check_department_exists(db, employee_data["Department"])
-    if not department:
-        result["status"] = "failed"
-        result["failure_reason"] = f"Department '{employee_data['Department']}' does not exist"
-        return result
-    
-    # Check if role exists
-    role = check_role_exists(db, employee_data["RoleCode"])
-    if not role:
-        result["status"] = "failed"
-        result["failure_reason"] = f"Role '{employee_data['RoleCode']}' does not exist"
-        return result
-    
-
+    if employee_data["RoleCode"] not in lookups["roles"]:
+        return f"Role '{employee_data['RoleCode']}' does not exist"
 
     job_code = employee_data["JobCode"]
-    role_job = check_job_code_exists(db, job_code)
-    if not role_job:
-        result["status"] = "failed"
-        result["failure_reason"] = f"Job code '{job_code}' does not exist"
-        return result
-    
-    conflicting_employee = db.query(Employee).filter(
-        Employee.job_code == job_code,
-        Employee.employee_number != employee_number
-    ).first()
-    if conflicting_employee:
-        result["status"] = "failed"
-        result["failure_reason"] = f"Job code '{job_code}' is already assigned to another employee"
-        return result
-
+    if job_code not in lookups["active_jobs"]:
+        return f"Job code '{job_code}' does not exist"
 
+    if lookups["job_holders"].get(job_code, set()) - {employee_data["EmployeeNumber"]}:
+        return f"Job code '{job_code}' is already assigned to another employee"
 
     for comp_data in employee_data["Competencies"]:
-        competency = check_competency_exists(db, comp_data["Code"])
-        if not competency:
-            result["status"] = "failed"
-            result["failure_reason"] = f"Competencies '{comp_data['Code']}' does not exist"
-            return result
-    
-
+        if comp_data["Code"] not in lookups["competencies"]:
+            return f"Competencies '{comp_data['Code']}' does not exist"
+
+    return None
+
+
+def import_employee_batch(db: Session, employees: List[dict], progress: Optional[Callable] = None) -> List[dict]:
+    """Validate and write a batch of parsed employee sheets in a single transaction.
+
+    Sheets are applied in order against in-memory state so later sheets see
+    earlier ones, then employees, users and competencies are written with
+    bulk statements and committed once.
+    """
+    lookups = load_import_lookups(db, employees)
+    known_employees = lookups["known_employees"]
+    job_holders = lookups["job_holders"]
+    employee_competencies = lookups["employee_competencies"]
+
+    new_employees = {}
+    updated_employees = {}
+    user_roles = {}
+    manager_numbers = set()
+    planned_competencies = {}
+    stats_slices = set()
+    processed_results = []
 
-    # Create or update employee
-    try:  
-        employee = create_or_update_employee(db, employee_data, department,role)
-        if employee == "error":
+    for employee_data in employees:
+        employee_number = employee_data["EmployeeNumber"]
+        result = {
+            "employee_number": employee_number,
+            "employee_name": employee_data["EmployeeName"],
+            "status": "processed",
+            "failure_reason": None
+        }
+        processed_results.append(result)
+
+        if progress:
+            progress("importing", len(processed_results), len(employees))
+
+        failure_reason = validate_employee_data(lookups, employee_data)
+        if failure_reason:
             result["status"] = "failed"
-            result["failure_reason"] = "Database error occurred"
-        else:
-            result["status"] = employee
-            
-    except Exception as e:
-        result["status"] = "failed"
-        result["failure_reason"] = str(e)
-    
-    return result
+            result["failure_reason"] = failure_reason
+            continue
 
-def create_or_update_employee(db: Session, employee_data: dict, department: Department, 
-                             role: Role) -> Employee:
-    """Create or update an employee based on the parsed data."""
-    employee_number = employee_data["EmployeeNumber"]
-  
-    # Check if employee already exists
-    employee = db.query(Employee).filter(Employee.employee_number == employee_number).first()
-    
-    # Check if reporting employee exists, if not create a dummy one
-    if employee_data["ReportingNumber"]:
-        reporting_employee = db.query(Employee).filter(
-            Employee.employee_number == employee_data["ReportingNumber"]
-        ).first()
-        
-        if not reporting_employee:
-          
-            
-            reporting_employee = Employee(
-                employee_number=employee_data["ReportingNumber"],
-                employee_name=f"Manager {employee_data['ReportingNumber']}",
-                job_code="dummy100",
-                reporting_to="100000000",
-                role_id=100,
-                department_id=100
-            )
-            db.add(reporting_employee)
-            db.commit()
-            db.refresh(reporting_employee)
-            
-            # Create user for the dummy reporting employee
-            create_manager(db, reporting_employee.employee_number)
-            
-           
-    
-    # Ensure department-role link if both entities exist
-    # ensure_department_role_link(db, department.id, role.id)
-    
-    if not employee:
-        # Create new employee
-        status ="Created"
-        employee = Employee(
-            employee_number=employee_number,
-            employee_name=employee_data["EmployeeName"],
-            job_code=employee_data["JobCode"],
-            reporting_to=employee_data["ReportingNumber"],
-            role_id=role.id,
-            department_id=department.id
+        # Reporting employees that do not exist yet get a dummy manager record
+        reporting_number = employee_data["ReportingNumber"]
+        if reporting_number:
+            if reporting_number not in known_employees:
+                dummy = {
+                    "employee_number": reporting_number,
+                    "employee_name": f"Manager {reporting_number}",
+                    "job_code": DUMMY_MANAGER_JOB_CODE,
+                    "reporting_to": DUMMY_MANAGER_REPORTING_TO,
+                    "role_id": DUMMY_MANAGER_ROLE_ID,
+                    "department_id": DUMMY_MANAGER_DEPARTMENT_ID,
+                }
+                known_employees[reporting_number] = dummy
+                new_employees[reporting_number] = dummy
+                job_holders.setdefault(DUMMY_MANAGER_JOB_CODE, set()).add(reporting_number)
+            manager_numbers.add(reporting_number)
+
+        employee = known_employees.get(employee_number)
+        if employee is None:
+            result["status"] = "Created"
+            employee = {"employee_number": employee_number}
+            known_employees[employee_number] = employee
+            new_employees[employee_number] = employee
+            user_roles[employee_number] = "Manager" if employee_number in lookups["managers_in_db"] else "Employee"
+        else:
+            result["status"] = "Updated"
+            stats_slices.add((employee.get("department_id"), employee.get("reporting_to")))
+            if employee_number not in new_employees:
+                updated_employees[employee_number] = employee
+
+        job_holders.get(employee.get("job_code"), set()).discard(employee_number)
+        job_holders.setdefault(employee_data["JobCode"], set()).add(employee_number)
+
+        employee.update({
+            "employee_name": employee_data["EmployeeName"],
+            "job_code": employee_data["JobCode"],
+            "reporting_to": reporting_number,
+            "role_id": lookups["roles"][employee_data["RoleCode"]],
+            "department_id": lookups["departments"][employee_data["Department"]],
+        })
+        stats_slices.add((employee["department_id"], employee["reporting_to"]))
+
+        # later sheets for the same employee override earlier scores
+        planned_competencies.setdefault(employee_number, {}).update(
+            {comp_data["Code"]: comp_data["Score"] for comp_data in employee_data["Competencies"]}
         )
-        db.add(employee)
-        db.commit()
-        db.refresh(employee)
-        
-        # Create user for the new employee and manger role for reported officer
-        update_user(db,employee.reporting_to)
-
-        create_user(db, employee.employee_number)
-    else:
-          # Update employee details
-        status ="Updated"
-        employee.employee_name = employee_data["EmployeeName"]
-        employee.reporting_to = employee_data["ReportingNumber"]
-        employee.job_code=employee_data["JobCode"]
-        #need to test this^
-        employee.role_id = role.id
-        employee.department_id = department.id
-
-        
-        db.commit()
-        db.refresh(employee)
-
-
-        update_user(db,employee.reporting_to)
-    # Update employee competencies
-    update_employee_competencies(db, employee, employee_data)
-    
-    # return employee
-    return status
-
-def update_employee_competencies(db: Session, employee: Employee, employee_data:Dict) -> None:
-    # Update employee competencies  table without deleting existing ones.
 
-    role_id = employee.role_id
+    # reporting employees are always managers
+    for number in manager_numbers:
+        user_roles[number] = "Manager"
 
-    # # Fetch existing role competencies for this role
-    # role_competency_map = {
-    #     rc.competency_code: rc for rc in db.query(RoleCompetency).filter(RoleCompetency.role_id == role_id).all()
-    # }
-
-    # Fetch existing employee competencies
-    emp_competency_map = {
-        ec.competency_code: ec for ec in db.query(EmployeeCompetency).filter(
-            EmployeeCompetency.employee_number == employee.employee_number
-        ).all()
+    # add and rescore competencies from the sheets without deleting existing ones
+    competency_diffs = {
+        number: diff_competencies(employee_competencies.get(number, {}), target, remove=False)
+        for number, target in planned_competencies.items()
     }
 
-    for comp_data in employee_data["Competencies"]:
-        code = comp_data["Code"]
-        score = comp_data["Score"]
-
-        # 1. Update or create EmployeeCompetency
-        if code in emp_competency_map:
-            # Update required_score if different
-            ec = emp_competency_map[code]
-            if ec.required_score != score:
-                ec.required_score = score
-        else:
-            # Create new EmployeeCompetency
-            db.add(EmployeeCompetency(
-                employee_number=employee.employee_number,
-                competency_code=code,
-                required_score=score,
-                actual_score=0
-            ))
-
-        # # 2. Update or create RoleCompetency
-        # if code in role_competency_map:
-        #     rc = role_competency_map[code]
-        #     if rc.role_competency_required_score != score:
-        #         rc.role_competency_required_score = score
-        # else:
-        #     db.add(RoleCompetency(
-        #         role_id=role_id,
-        #         competency_code=code,
-        #         role_competency_required_score=score
-        #     ))
-
-    db.commit()
-
-
-
-
-
-def create_user(db: Session, employee_number: str) -> User:
-    """Create user for an employee if doesn't exist."""
-    # Check if employee has direct reports
-   
-    reporting_employees = db.query(Employee).filter(Employee.reporting_to == employee_number).count()
-    role = "Manager" if reporting_employees > 0 else "Employee"
-
-    user = db.query(User).filter(User.employee_number == employee_number).first()
-    if not user:
-        user = User(
-            employee_number=employee_number,
-            email=f"{employee_number}@company.com",
-            hashed_password=get_password_hash(employee_number),
-            role=role
-        )
-        db.add(user)
-    else: 
-        if user.role != role:  # Update role only if it has changed
-            user.role = role
     try:
-        db.commit()
-        db.refresh(user)
-    except IntegrityError:
-        db.rollback()
-    
-    return user
-
-
-
-def update_user(db: Session, employee_number: str) -> User:
-    """Create user for an employee if doesn't exist."""
-    user = db.query(User).filter(User.employee_number == employee_number).first()
-    if not user:
-        user = User(
-            employee_number=employee_number,
-            email=f"{employee_number}@company.com",
-            hashed_password=get_password_hash(employee_number),
-            role="Manager"
+        role_changes = write_employee_batch(
+            db, lookups, list(new_employees.values()), list(updated_employees.values()),
+            user_roles, competency_diffs
         )
-        db.add(user)
-    else: 
-        if user.role != "Manager":  # Update role only if it has changed
-            user.role = "Manager"
-    try:
+        refresh_competency_stats(db, stats_slices)
         db.commit()
-        db.refresh(user)
-    except IntegrityError:
+        for number in role_changes:
+            invalidate_user(number)
+        invalidate_all()
+    except Exception as e:
         db.rollback()
-    
-    return user
+        for result in processed_results:
+            if result["status"] != "failed":
+                result["status"] = "failed"
+                result["failure_reason"] = str(e)
 
+    return processed_results
 
 
-def create_manager(db: Session, employee_number: str) -> User:
-  
-    user = db.query(User).filter(User.employee_number == employee_number).first()
-    if not user:
-        user = User(
-            employee_number=employee_number,
-            email=f"{employee_number}@company.com",
-            hashed_password=get_password_hash(employee_number),
-            role="Manager"
-        )
-        db.add(user)
-    else: 
-        if user.role != "Manager":  # Update role only if it has changed
-            user.role = "Manager"
-    try:
-        db.commit()
-        db.refresh(user)
-    except IntegrityError:
-        db.rollback()
-    
-    return user
+def write_employee_batch(db: Session, lookups: dict, new_employees: List[dict], updated_employees: List[dict],
+                         user_roles: Dict[str, str], competency_diffs: Dict[str, dict]) -> List[str]:
+    """Flush the planned import with bulk INSERT/UPDATE statements, without committing.
+
+    Returns the employee numbers whose user role changed.
+    """
+    employee_columns = ["employee_number", "employee_name", "job_code", "reporting_to", "role_id", "department_id"]
+
+    if new_employees:
+        db.execute(insert(Employee), [{c: e[c] for c in employee_columns} for e in new_employees])
+    if updated_employees:
+        db.execute(update(Employee), [{c: e[c] for c in employee_columns} for e in updated_employees])
+
+    # move job occupancy with the employees; the guarded UPDATE fails the whole
+    # batch when a concurrent writer took one of the codes in the meantime
+    written = new_employees + updated_employees
+    release_jobs(db, [e["employee_number"] for e in written])
+    occupancy = [
+        {"b_job_code": e["job_code"], "b_employee_number": e["employee_number"]}
+        for e in written
+        if e["job_code"] != DUMMY_JOB_CODE
+    ]
+    if occupancy:
+        jobs = RoleJob.__table__
+        occupied = db.execute(
+            update(jobs)
+            .where(
+                jobs.c.job_code == bindparam("b_job_code"),
+                or_(jobs.c.occupied_by.is_(None), jobs.c.occupied_by == bindparam("b_employee_number"))
+            )
+            .values(occupied_by=bindparam("b_employee_number")),
+            occupancy
+        ).rowcount
+        if occupied != len(occupancy):
+            raise ValueError("A job code in this import was assigned to another employee meanwhile")
+        refresh_job_summary(db, {lookups["job_roles"].get(o["b_job_code"]) for o in occupancy})
+
+    users = lookups["users"]
+    new_users = []
+    role_updates = []
+    role_changes = []
+    for number, role in user_roles.items():
+        user = users.get(number)
+        if user is None:
+            email = f"{number}@company.com"
+            if email in lookups["taken_emails"]:
+                continue
+            new_users.append({
+                "employee_number": number,
+                "email": email,
+                "role": role
+            })
+        elif user["role"] != role:
+            role_updates.append({"id": user["id"], "role": role})
+            role_changes.append(number)
+
+    if new_users:
+        # initial password is the employee number, hashed in parallel
+        hashes = get_password_hashes([user["employee_number"] for user in new_users])
+        for user, hashed_password in zip(new_users, hashes):
+            user["hashed_password"] = hashed_password
+        db.execute(insert(User), new_users)
+    if role_updates:
+        db.execute(update(User), role_updates)
+
+    apply_competency_diffs(db, competency_diffs)
+
+    return role_changes
+
+
+def parse_sheets(excel_content: bytes, sheet_names: List[str], progress: Optional[Callable] = None) -> List[dict]:
+    """Parse the given sheets of one workbook, this runs inside a parse worker."""
+    workbook = load_workbook(BytesIO(excel_content), read_only=True, data_only=True)
+    parsed = []
 
-def  extract_employee_data_from_excel(excel_content: bytes, db: Session) -> List[dict]:
-    """Extract employee data from Excel file bytes and process it in the database."""
-    xls = pd.ExcelFile(BytesIO(excel_content))
-    processed_results = []
-    
-    for sheet_name in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name=sheet_name, header=None)
-        csv_lines = convert_excel_sheet_to_csv_lines(df)
-        employee_data = parse_employee_data_from_csv_lines(csv_lines)
-        
-        if employee_data != "error" and employee_data["EmployeeNumber"]:
-            # Process the employee data
-            result = process_employee_data(db, employee_data)
-            processed_results.append(result)
+    try:
+        for sheet_name in sheet_names:
+            words = list(iter_sheet_words(workbook[sheet_name]))
+            parsed.append(parse_employee_data_from_words(words))
+            if progress:
+                progress("parsing", len(parsed), len(sheet_names))
+    finally:
+        workbook.close()
+    return parsed
+
+
+def parse_workbook(excel_content: bytes, workers: Optional[int] = None,
+                   progress: Optional[Callable] = None) -> List[dict]:
+    """Parse every sheet of the workbook into employee dicts, skipping unusable sheets.
+
+    Sheets are read with openpyxl in read-only mode and split into contiguous
+    chunks parsed by a process pool so big workbooks use every core; results
+    keep the workbook's sheet order.
+    progress, when given, is called as progress(stage, done, total).
+    """
+    workbook = load_workbook(BytesIO(excel_content), read_only=True)
+    sheet_names = workbook.sheetnames
+    workbook.close()
+
+    workers = workers or IMPORT_PARSE_WORKERS
+    workers = max(1, min(workers, math.ceil(len(sheet_names) / MIN_SHEETS_PER_PARSE_WORKER)))
+
+    if workers == 1:
+        parsed = parse_sheets(excel_content, sheet_names, progress)
+    else:
+        chunk_size = math.ceil(len(sheet_names) / workers)
+        chunks = [sheet_names[i:i + chunk_size] for i in range(0, len(sheet_names), chunk_size)]
+        parsed = []
+        # spawn, forking would copy the server's threads and open connections
+        with ProcessPoolExecutor(max_workers=len(chunks), mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(parse_sheets, excel_content, chunk) for chunk in chunks]
+            for future in futures:
+                parsed.extend(future.result())
+                if progress:
+                    progress("parsing", len(parsed), len(sheet_names))
+
+    employees = []
+    for employee_data in parsed:
+        if employee_data["EmployeeNumber"]:
+            employees.append(employee_data)
         else:
             print("Employee data xl sheet is failded")
-    return processed_results
-
-
+    return employees
 
 
-from fastapi import APIRouter, Depends, UploadFile, File
-from sqlalchemy.orm import Session
-from database import get_db
-
-router = APIRouter()
+def  extract_employee_data_from_excel(excel_content: bytes, db: Session,
+                                      progress: Optional[Callable] = None) -> List[dict]:
+    """Extract employee data from Excel file bytes and process it in the database."""
+    employees = parse_workbook(excel_content, progress=progress)
+    return import_employee_batch(db, employees, progress)
 
-@router.post("/employees/upload-employee-data/")
-async def upload_employee_data(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),current_user: Dict = Depends(hr_or_admin_required)
-):
-    contents = await file.read()
-    processed_results = extract_employee_data_from_excel(contents, db)
 
+def summarize_import(processed_results: List[dict]) -> dict:
     success_count = sum(1 for result in processed_results if result["status"] == "processed" or result["status"] == "Updated")
     failure_count = sum(1 for result in processed_results if result["status"] == "failed")
-    
 
     return {
-        "status": "success",
-        "summary": {
-            "total": len(processed_results),
-            "processed": success_count,
-            "failed": failure_count
-        },
-        "processed_employees": processed_results
+        "total": len(processed_results),
+        "processed": success_count,
+        "failed": failure_count
     }
-
-
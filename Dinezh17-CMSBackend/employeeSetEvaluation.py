@@ -2,9 +2,11 @@ from datetime import date
 from http.client import HTTPException
 from typing import Dict, List
 from auth import get_current_user, hr_or_admin_required
+from competencyStats import refresh_competency_stats
 from database import get_db
 from fastapi import APIRouter, Depends
 from models import Employee, User
+from responseCache import invalidate_employees
 from schemas import BulkEvaluationStatusUpdate,EmployeeResponse
 from sqlalchemy.orm import Session
 
@@ -49,5 +51,9 @@ async def bulk_update_evaluation_status(
 
     print("email sent to these managers", emails , "subject - finish your teams competency evaluation")
 
+    refresh_competency_stats(db, {(employee.department_id, employee.reporting_to) for employee in employees})
+    # read before the commit expires the instances
+    employee_numbers = [emp.employee_number for emp in employees]
     db.commit()
-    return (emp.employee_number for emp in employees) 
\ No newline at end of file
+    invalidate_employees(employee_numbers)
+    return employee_numbers 
\ No newline at end of file
@@ -0,0 +1,252 @@
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from auth import hr_or_admin_required
+from database import SessionLocal
+from employeeExcel import extract_employee_data_from_excel, summarize_import
+from models import ImportJob
+
+router = APIRouter()
+
+
+# a job runs on the worker thread of the process that accepted the upload,
+# its state lives in import_jobs so polls can land on any server process
+IMPORT_SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR", "./import_spool")
+# finished jobs kept for polling, oldest are dropped first
+MAX_FINISHED_IMPORT_JOBS = 100
+# per employee progress is written at most this often
+IMPORT_PROGRESS_FLUSH_SECONDS = float(os.getenv("IMPORT_PROGRESS_FLUSH_SECONDS", 1.0))
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+PROCESS_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+PUBLIC_JOB_FIELDS = [
+    "id", "filename", "status", "stage", "total_sheets", "parsed_sheets", "sheets_per_second",
+    "employees_to_import", "imported_employees", "created_at", "started_at", "finished_at",
+    "error", "summary", "processed_employees",
+]
+
+_job_queue: "queue.Queue[str]" = queue.Queue()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+
+
+def spool_path(job_id: str) -> str:
+    return os.path.join(IMPORT_SPOOL_DIR, f"{job_id}.xlsx")
+
+
+def _update_job(job_id: str, **fields) -> None:
+    with SessionLocal() as db:
+        db.query(ImportJob).filter(ImportJob.id == job_id).update(fields, synchronize_session=False)
+        db.commit()
+
+
+def _report_progress(job_id: str, started: float):
+    """Build the progress(stage, done, total) callback for one job, writing it out at most once per flush interval."""
+    last_flush = {"at": 0.0, "stage": None}
+
+    def progress(stage: str, done: int, total: int) -> None:
+        now = time.monotonic()
+        if stage == last_flush["stage"] and done < total and now - last_flush["at"] < IMPORT_PROGRESS_FLUSH_SECONDS:
+            return
+        last_flush.update(at=now, stage=stage)
+        if stage == "parsing":
+            elapsed = now - started
+            fields = {
+                "stage": stage,
+                "total_sheets": total,
+                "parsed_sheets": done,
+                "sheets_per_second": round(done / elapsed, 2) if elapsed > 0 else None,
+            }
+        else:
+            fields = {"stage": stage, "employees_to_import": total, "imported_employees": done}
+        try:
+            _update_job(job_id, **fields)
+        except SQLAlchemyError:
+            # progress is advisory, a busy database must not fail the import
+            pass
+    return progress
+
+
+def _prune_finished_jobs() -> None:
+    with SessionLocal() as db:
+        stale = [
+            row.id for row in db.query(ImportJob.id)
+            .filter(ImportJob.status.in_(["completed", "failed"]))
+            .order_by(ImportJob.finished_at.desc())
+            .offset(MAX_FINISHED_IMPORT_JOBS)
+        ]
+        if stale:
+            db.query(ImportJob).filter(ImportJob.id.in_(stale)).delete(synchronize_session=False)
+            db.commit()
+
+
+def run_import_job(job_id: str) -> None:
+    """Execute one spooled import with its own session and record the outcome."""
+    started = time.monotonic()
+    _update_job(job_id, status="running", stage="parsing", started_at=datetime.utcnow())
+    path = spool_path(job_id)
+
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as f:
+            contents = f.read()
+        processed_results = extract_employee_data_from_excel(contents, db, _report_progress(job_id, started))
+        _update_job(
+            job_id,
+            status="completed",
+            stage="completed",
+            finished_at=datetime.utcnow(),
+            summary=summarize_import(processed_results),
+            processed_employees=processed_results,
+        )
+    except Exception as e:
+        db.rollback()
+        _update_job(job_id, status="failed", finished_at=datetime.utcnow(), error=str(e))
+    finally:
+        db.close()
+        if os.path.exists(path):
+            os.remove(path)
+        _prune_finished_jobs()
+
+
+def _work() -> None:
+    while True:
+        job_id = _job_queue.get()
+        try:
+            run_import_job(job_id)
+        finally:
+            _job_queue.task_done()
+
+
+def _ensure_worker() -> None:
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name="import-worker", daemon=True)
+            _worker.start()
+
+
+def create_import_job(job_id: str, filename: str) -> None:
+    """Record a queued job owned by this process, before anything is spooled for it."""
+    with SessionLocal() as db:
+        db.add(ImportJob(
+            id=job_id,
+            filename=filename,
+            status="queued",
+            stage="queued",
+            parsed_sheets=0,
+            imported_employees=0,
+            created_at=datetime.utcnow(),
+            owner=PROCESS_OWNER,
+        ))
+        db.commit()
+
+
+def enqueue_import(job_id: str) -> dict:
+    _ensure_worker()
+    _job_queue.put(job_id)
+    return get_job(job_id)
+
+
+def public_job(job: ImportJob) -> dict:
+    return {field: getattr(job, field) for field in PUBLIC_JOB_FIELDS}
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    with SessionLocal() as db:
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        return public_job(job) if job else None
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the process that owns a job may still be running it.
+
+    Processes on other hosts cannot be checked and are assumed alive; a job
+    owned by this pid predates this process, which has not queued anything yet.
+    """
+    if not owner:
+        return False
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return True
+    if int(pid) == os.getpid():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_import_jobs() -> None:
+    """Fail the queued and running jobs of dead processes and remove spooled files no live job needs."""
+    with SessionLocal() as db:
+        active = db.query(ImportJob).filter(ImportJob.status.in_(["queued", "running"])).all()
+        live_ids = set()
+        for job in active:
+            if _owner_alive(job.owner):
+                live_ids.add(job.id)
+                continue
+            job.status = "failed"
+            job.finished_at = datetime.utcnow()
+            job.error = "Import interrupted by a server restart, upload the file again"
+        db.commit()
+
+    if os.path.isdir(IMPORT_SPOOL_DIR):
+        for name in os.listdir(IMPORT_SPOOL_DIR):
+            if os.path.splitext(name)[0] not in live_ids:
+                os.remove(os.path.join(IMPORT_SPOOL_DIR, name))
+
+
+
+
+@router.post("/employees/upload-employee-data/")
+async def upload_employee_data(
+    file: UploadFile = File(...),
+    current_user: Dict = Depends(hr_or_admin_required)
+):
+    # spool the upload to disk in chunks, the import itself runs on the worker;
+    # the job row comes first so startup cleanup never takes the file.
+    # database calls go to the threadpool, only the spooling awaits here
+    os.makedirs(IMPORT_SPOOL_DIR, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    await run_in_threadpool(create_import_job, job_id, file.filename)
+
+    try:
+        with open(spool_path(job_id), "wb") as spool:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                spool.write(chunk)
+    except Exception as e:
+        await run_in_threadpool(
+            _update_job, job_id, status="failed", finished_at=datetime.utcnow(), error=str(e)
+        )
+        if os.path.exists(spool_path(job_id)):
+            os.remove(spool_path(job_id))
+        raise
+
+    job = await run_in_threadpool(enqueue_import, job_id)
+    return {"status": "queued", "job_id": job_id, "job": job}
+
+
+
+
+@router.get("/imports/{job_id}")
+def get_import_job(job_id: str, current_user: Dict = Depends(hr_or_admin_required)):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
@@ -0,0 +1,143 @@
+import os
+import sys
+import tempfile
+import time
+from sqlalchemy import text
+from database import Base, create_db_engine
+from migrations import _add_hot_column_indexes, _add_job_indexes, _add_job_occupancy
+
+# Compare query plans and timings of the hot queries before and after the
+# hot column index migration, on a throwaway SQLite database.
+#
+#   python indexBenchmark.py [employees] [competencies_per_employee]
+
+HOT_INDEXES = [
+    "uq_employee_competencies_employee_competency",
+    "ix_employee_competencies_competency_code",
+    "ix_employees_reporting_to",
+    "ix_employees_role_id",
+    "ix_employees_department_id",
+    "ix_employees_evaluation_status",
+    "ix_users_employee_number",
+    "ix_employees_job_code",
+    "ix_role_job_role_code",
+    "ix_role_job_occupied_by",
+]
+
+QUERIES = {
+    "score submit": (
+        "SELECT * FROM employee_competencies WHERE employee_number = :emp AND competency_code = :comp",
+        {"emp": "E00500", "comp": "C007"},
+    ),
+    "employee competencies": (
+        "SELECT * FROM employee_competencies WHERE employee_number = :emp",
+        {"emp": "E00500"},
+    ),
+    "competency holders": (
+        "SELECT employee_number FROM employee_competencies WHERE competency_code = :comp",
+        {"comp": "C007"},
+    ),
+    "direct reports": (
+        "SELECT * FROM employees WHERE reporting_to = :emp",
+        {"emp": "E00001"},
+    ),
+    "role members": (
+        "SELECT employee_number FROM employees WHERE role_id = :role",
+        {"role": 3},
+    ),
+    "department members": (
+        "SELECT employee_number FROM employees WHERE department_id = :dept AND evaluation_status = 'True'",
+        {"dept": 2},
+    ),
+    "available job codes": (
+        "SELECT job_code, job_name FROM role_job "
+        "WHERE role_code = :role AND job_status = 1 AND job_code != 'dummy100' "
+        "AND (occupied_by IS NULL OR occupied_by = :emp) ORDER BY job_code",
+        {"emp": "E00500", "role": "R03"},
+    ),
+    "user of employee": (
+        "SELECT * FROM users WHERE employee_number = :emp",
+        {"emp": "E00500"},
+    ),
+}
+
+RUNS = 50
+
+
+def seed(conn, employees: int, per_employee: int) -> None:
+    conn.execute(text(
+        "INSERT INTO employees (employee_number, employee_name, job_code, reporting_to, role_id, department_id, evaluation_status) "
+        "VALUES (:n, :n, :n, :mgr, :role, :dept, :status)"
+    ), [
+        {
+            "n": f"E{i:05d}",
+            "mgr": f"E{(i % 50) + 1:05d}",
+            "role": i % 20,
+            "dept": i % 10,
+            "status": "True" if i % 3 else "False",
+        }
+        for i in range(1, employees + 1)
+    ])
+    # one occupied job per employee plus as many vacant ones, spread over 20 roles
+    conn.execute(text(
+        "INSERT INTO role_job (job_code, job_name, role_code, job_status, occupied_by) "
+        "VALUES (:code, 'job', :role, 1, :holder)"
+    ), [
+        {"code": f"E{i:05d}", "role": f"R{i % 20:02d}", "holder": f"E{i:05d}" if i <= employees else None}
+        for i in range(1, 2 * employees + 1)
+    ])
+    conn.execute(text(
+        "INSERT INTO users (email, hashed_password, role, employee_number) VALUES (:e, 'x', 'EMPLOYEE', :n)"
+    ), [{"n": f"E{i:05d}", "e": f"e{i}@example.com"} for i in range(1, employees + 1)])
+    conn.execute(text(
+        "INSERT INTO employee_competencies (employee_number, competency_code, required_score, actual_score) "
+        "VALUES (:n, :c, 3, 2)"
+    ), [
+        {"n": f"E{i:05d}", "c": f"C{c:03d}"}
+        for i in range(1, employees + 1)
+        for c in range(per_employee)
+    ])
+
+
+def measure(conn, label: str) -> None:
+    print(f"\n== {label} ==")
+    for name, (sql, params) in QUERIES.items():
+        plan = " | ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql), params))
+        started = time.perf_counter()
+        for _ in range(RUNS):
+            conn.execute(text(sql), params).fetchall()
+        elapsed_ms = (time.perf_counter() - started) * 1000 / RUNS
+        print(f"{name:<22} {elapsed_ms:8.3f} ms  {plan}")
+
+
+def main(employees: int = 5000, per_employee: int = 20) -> None:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_db_engine(f"sqlite:///{path}")
+    try:
+        with engine.begin() as conn:
+            Base.metadata.create_all(bind=conn)
+            for name in HOT_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            seed(conn, employees, per_employee)
+            conn.execute(text("ANALYZE"))
+
+        print(f"{employees} employees, {employees * per_employee} employee competencies, {RUNS} runs per query")
+        with engine.connect() as conn:
+            measure(conn, "before")
+        with engine.begin() as conn:
+            _add_hot_column_indexes(conn)
+            _add_job_indexes(conn)
+            _add_job_occupancy(conn)
+            conn.execute(text("ANALYZE"))
+        with engine.connect() as conn:
+            measure(conn, "after")
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -1,57 +1,318 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import Integer, and_, cast, delete, exists, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+from typing import Dict, Iterable, List, Optional, Set
+from auth import hr_or_admin_required
 from database import get_db
-from models import Department, DepartmentRole, Employee, Role, RoleJob
-from schemas import CreateJobsRequest, JobCodeResponse, JobDeleteRequest
+from models import Department, DepartmentRole, Employee, JobSummary, Role, RoleJob
+from responseCache import invalidate_all, invalidate_employees
+from schemas import CreateJobsRequest, JobClaimRequest, JobCodeResponse, JobDeleteRequest
 from sqlalchemy import func, desc
 
 router = APIRouter()
 
 
+# shared by every placeholder manager created on import, never occupied or claimed
+DUMMY_JOB_CODE = "dummy100"
+
+JOB_SUMMARY_COLUMNS = [
+    JobSummary.role_code,
+    JobSummary.job_name,
+    JobSummary.total_count,
+    JobSummary.filled_count,
+    JobSummary.last_code,
+]
+
+
+def job_summary_select(*criteria):
+    """Aggregate role_job per role x job name, leaving out the shared dummy job."""
+    return (
+        select(
+            RoleJob.role_code,
+            RoleJob.job_name,
+            func.count(RoleJob.job_code),
+            func.count(RoleJob.occupied_by),
+            func.max(RoleJob.job_code)
+        )
+        .where(RoleJob.job_code != DUMMY_JOB_CODE, *criteria)
+        .group_by(RoleJob.role_code, RoleJob.job_name)
+    )
+
+
+def refresh_job_summary(db: Session, role_codes: Iterable[str]) -> None:
+    """Recompute the summary rows of the given roles inside the caller's transaction."""
+    role_codes = [code for code in set(role_codes) if code is not None]
+    for start in range(0, len(role_codes), 500):
+        chunk = role_codes[start:start + 500]
+        db.execute(
+            delete(JobSummary)
+            .where(JobSummary.role_code.in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            insert(JobSummary).from_select(JOB_SUMMARY_COLUMNS, job_summary_select(RoleJob.role_code.in_(chunk)))
+        )
+
+
+def rebuild_job_summary(db: Session) -> Dict[str, int]:
+    """Drop and rebuild the whole summary from role_job."""
+    db.query(JobSummary).delete(synchronize_session=False)
+    db.execute(insert(JobSummary).from_select(JOB_SUMMARY_COLUMNS, job_summary_select()))
+    db.commit()
+    return {"rows": db.query(JobSummary).count()}
+
+
+def held_job_roles(db: Session, *criteria) -> Set[str]:
+    """Return the roles of the role_job rows matching criteria."""
+    return {row.role_code for row in db.query(RoleJob.role_code).filter(*criteria).distinct()}
+
+
+def release_jobs(db: Session, employee_numbers: List[str]) -> None:
+    """Free every job held by the employees, inside the caller's transaction."""
+    for start in range(0, len(employee_numbers), 500):
+        chunk = employee_numbers[start:start + 500]
+        role_codes = held_job_roles(db, RoleJob.occupied_by.in_(chunk))
+        if not role_codes:
+            continue
+        db.execute(
+            update(RoleJob)
+            .where(RoleJob.occupied_by.in_(chunk))
+            .values(occupied_by=None)
+            .execution_options(synchronize_session=False)
+        )
+        refresh_job_summary(db, role_codes)
+
+
+def occupy_job(db: Session, job_code: str, employee_number: str) -> bool:
+    """Mark job_code as held by the employee, freeing any other job it held.
+
+    The guarded UPDATE only succeeds while the job is free or already the
+    employee's, so two writers can never hold the same code; False means the
+    code is taken or does not exist.
+    """
+    role_codes = held_job_roles(db, or_(RoleJob.occupied_by == employee_number, RoleJob.job_code == job_code))
+    db.execute(
+        update(RoleJob)
+        .where(RoleJob.occupied_by == employee_number, RoleJob.job_code != job_code)
+        .values(occupied_by=None)
+        .execution_options(synchronize_session=False)
+    )
+    if job_code == DUMMY_JOB_CODE:
+        refresh_job_summary(db, role_codes)
+        return True
+    occupied = db.execute(
+        update(RoleJob)
+        .where(
+            RoleJob.job_code == job_code,
+            or_(RoleJob.occupied_by.is_(None), RoleJob.occupied_by == employee_number)
+        )
+        .values(occupied_by=employee_number)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    refresh_job_summary(db, role_codes)
+    return occupied == 1
+
+
+def claim_next_job(db: Session, role_code: str, employee_number: str, job_name: Optional[str] = None) -> Optional[str]:
+    """Atomically take the lowest free active job code of a role for the employee, or None when full.
+
+    Each attempt is one guarded UPDATE of the lowest free code; when a racing
+    writer takes it first the attempt is repeated, so None only comes back
+    once no free code is left.
+    """
+    release_jobs(db, [employee_number])
+    # the subquery reads role_job under an alias so it is not correlated with the UPDATE target
+    candidate = aliased(RoleJob)
+    free_jobs = select(candidate.job_code).where(
+        candidate.role_code == role_code,
+        candidate.job_status == True,
+        candidate.occupied_by.is_(None),
+        candidate.job_code != DUMMY_JOB_CODE
+    )
+    if job_name:
+        free_jobs = free_jobs.where(candidate.job_name == job_name)
+    lowest_free = free_jobs.order_by(candidate.job_code).limit(1).scalar_subquery()
+
+    while True:
+        claimed = db.execute(
+            update(RoleJob)
+            .where(RoleJob.job_code == lowest_free, RoleJob.occupied_by.is_(None))
+            .values(occupied_by=employee_number)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed == 1:
+            refresh_job_summary(db, [role_code])
+            return db.query(RoleJob.job_code).filter(RoleJob.occupied_by == employee_number).scalar()
+        if db.execute(free_jobs.limit(1)).first() is None:
+            return None
+
+
+def next_job_number(db: Session, prefix: str) -> int:
+    """One past the highest number used after prefix, 1 for a new prefix.
+
+    Codes of longer prefixes (LCSSTGRKY0308 for LCSSTGR) have a non-numeric
+    suffix and are filtered out before the cast, which PostgreSQL would reject.
+    """
+    suffix = func.substr(RoleJob.job_code, len(prefix) + 1)
+    if db.get_bind().dialect.name == "sqlite":
+        numeric = and_(suffix != "", ~suffix.op("GLOB")("*[^0-9]*"))
+    else:
+        numeric = suffix.regexp_match("^[0-9]+$")
+    highest = db.query(func.max(cast(suffix, Integer))).filter(
+        RoleJob.job_code.startswith(prefix, autoescape=True),
+        numeric
+    ).scalar()
+    return (highest or 0) + 1
+
+
+def insert_jobs(db: Session, rows: List[dict]) -> int:
+    """Insert role_job rows in one executemany, skipping codes that exist; returns how many were created.
+
+    The count comes from RETURNING, executemany rowcounts are not reliable across drivers.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = (
+            dialect_insert(RoleJob.__table__)
+            .on_conflict_do_nothing(index_elements=["job_code"])
+            .returning(RoleJob.__table__.c.job_code)
+        )
+        return len(db.connection().execute(statement, rows).all())
+
+    # no ON CONFLICT elsewhere, filter out the existing codes first
+    codes = [row["job_code"] for row in rows]
+    existing = set()
+    for start in range(0, len(codes), 500):
+        existing.update(
+            code for (code,) in db.query(RoleJob.job_code).filter(RoleJob.job_code.in_(codes[start:start + 500]))
+        )
+    rows = [row for row in rows if row["job_code"] not in existing]
+    if rows:
+        db.execute(insert(RoleJob), rows)
+    return len(rows)
+
+
 @router.post("/jobs")
 def create_jobs(request: CreateJobsRequest, db: Session = Depends(get_db)):
-    for i in range(request.start, request.start + request.count):
-        job_code = f"{request.prefix}{str(i).zfill(4)}"
-        db_job = RoleJob(
-            job_code=job_code,
-            job_name=request.job_name,
-            role_code=request.role_code
+    start = request.start if request.start is not None else next_job_number(db, request.prefix)
+    rows = [
+        {
+            "job_code": f"{request.prefix}{str(i).zfill(4)}",
+            "job_name": request.job_name,
+            "role_code": request.role_code,
+            "job_status": True
+        }
+        for i in range(start, start + request.count)
+    ]
+    created = insert_jobs(db, rows) if rows else 0
+    if created:
+        refresh_job_summary(db, [request.role_code])
+    db.commit()
+    return {
+        "message": f"{created} jobs created for {request.job_name}",
+        "created": created,
+        "skipped": len(rows) - created,
+        "start": start
+    }
+
+
+
+# move an existing employee to the next vacancy of their role
+@router.post("/jobs/claim")
+def claim_job(request: JobClaimRequest, db: Session = Depends(get_db), current_user: dict = Depends(hr_or_admin_required)):
+    employee = (
+        db.query(Employee.employee_number, Role.role_code)
+        .outerjoin(Role, Role.id == Employee.role_id)
+        .filter(Employee.employee_number == request.employee_number)
+        .first()
+    )
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    if employee.role_code != request.role_code:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Employee {request.employee_number} has role {employee.role_code}, not {request.role_code}"
         )
-        db.add(db_job)
+
+    job_code = claim_next_job(db, request.role_code, request.employee_number, request.job_name)
+    if not job_code:
+        raise HTTPException(status_code=409, detail="No free job code left for this role")
+
+    db.query(Employee).filter(Employee.employee_number == request.employee_number).update(
+        {Employee.job_code: job_code}, synchronize_session=False
+    )
     db.commit()
-    return {"message": f"{request.count} jobs created for {request.job_name}"}
+    invalidate_employees([request.employee_number])
+    job = db.query(RoleJob.job_code, RoleJob.job_name).filter(RoleJob.job_code == job_code).first()
+    return {"job_code": job.job_code, "job_name": job.job_name, "employee_number": request.employee_number}
+
+
+# free a job whose occupancy no employee backs, e.g. one reserved for an
+# employee that was never created; jobs an employee holds move with the employee
+@router.delete("/jobs/claim/{job_code}")
+def release_job_claim(job_code: str, db: Session = Depends(get_db), current_user: dict = Depends(hr_or_admin_required)):
+    job = db.query(RoleJob.role_code, RoleJob.occupied_by).filter(RoleJob.job_code == job_code).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    holder = db.query(Employee.employee_number).filter(Employee.job_code == job_code).first()
+    if holder:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Job {job_code} is assigned to employee {holder.employee_number}, reassign the employee instead"
+        )
+    if job.occupied_by is None:
+        return {"job_code": job_code, "released": None}
+
+    db.execute(
+        update(RoleJob)
+        .where(RoleJob.job_code == job_code)
+        .values(occupied_by=None)
+        .execution_options(synchronize_session=False)
+    )
+    refresh_job_summary(db, [job.role_code])
+    db.commit()
+    return {"job_code": job_code, "released": job.occupied_by}
+
 
 
 
 @router.get("/jobs-summary")
-def get_jobs_summary(db: Session = Depends(get_db)):
-    jobs = (
+def get_jobs_summary(
+    department_id: Optional[int] = None,
+    role_code: Optional[str] = None,
+    role_category: Optional[str] = None,
+    job_name: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    # reads the job_summary rollup, role_job itself is never scanned here
+    query = (
         db.query(
             Department.name.label("department_name"),
             Role.role_code,
             Role.role_name,
             Role.role_category,
-            RoleJob.job_name,
-            func.count(RoleJob.job_code).label("count"),
-            func.max(RoleJob.job_code).label("LastCode")
+            JobSummary.job_name,
+            JobSummary.total_count,
+            JobSummary.filled_count,
+            JobSummary.last_code
         )
-        .join(Role, Role.role_code == RoleJob.role_code)
+        .join(Role, Role.role_code == JobSummary.role_code)
         .join(DepartmentRole, DepartmentRole.role_id == Role.id)
         .join(Department, Department.id == DepartmentRole.department_id)
-        .filter(RoleJob.job_code != "dummy100")
-        .group_by(
-            Department.name,
-            Role.role_code,
-            Role.role_name,
-            Role.role_category,
-            RoleJob.job_name
-        )
-        .order_by(desc("count"))
-        .all()
     )
+    if department_id is not None:
+        query = query.filter(Department.id == department_id)
+    if role_code:
+        query = query.filter(JobSummary.role_code == role_code)
+    if role_category:
+        query = query.filter(Role.role_category == role_category)
+    if job_name:
+        query = query.filter(JobSummary.job_name == job_name)
+    jobs = query.order_by(desc(JobSummary.total_count), Department.name, Role.role_code, JobSummary.job_name).all()
 
     return {
         "jobs_by_name": [
@@ -61,90 +322,128 @@ def get_jobs_summary(db: Session = Depends(get_db)):
                 "role_code": job.role_code,
                 "role_category": job.role_category,
                 "job_name": job.job_name,
-                "count": job.count,
-                "LastCode": job.LastCode
+                "count": job.total_count,
+                "filled": job.filled_count,
+                "vacant": job.total_count - job.filled_count,
+                "LastCode": job.last_code
             }
             for job in jobs
         ]
     }
 
 
+@router.post("/jobs-summary/rebuild")
+def rebuild_jobs_summary(db: Session = Depends(get_db), current_user: dict = Depends(hr_or_admin_required)):
+    return rebuild_job_summary(db)
+
+
 
 
 
 @router.get("/available-job-codes/{role_code}", response_model=List[JobCodeResponse])
-def get_available_job_codes(role_code: str , employee_number: str = Query(...), db: Session = Depends(get_db)):
-   
-    # Get all job codes already assigned to employees
-    print(employee_number,"number")
-    assigned_job_codes = [code[0] for code in db.query(Employee.job_code).filter(Employee.employee_number!=employee_number).all()]
-    print(assigned_job_codes)
-    # Get unique job names for the requested role
-    
-    
-    result = []
-    
- 
-        # Find first available job code for this job name
-    available = db.query(RoleJob)\
-                            .filter(
-                                RoleJob.role_code == role_code,
-                                
-                                ~RoleJob.job_code.in_(assigned_job_codes),
-                                RoleJob.job_status==True
-                            ).all()
-        
-    for first_available in available:
-            result.append({
-                "job_code": first_available.job_code,
-                "job_name": first_available.job_name
-            })
-    
-    
-    return result
+def get_available_job_codes(
+    role_code: str,
+    employee_number: str = Query(...),
+    prefix: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    # active jobs of the role that no other employee holds, read from the
+    # occupancy column; the employee's own job stays selectable
+    query = (
+        db.query(RoleJob.job_code, RoleJob.job_name)
+        .filter(
+            RoleJob.role_code == role_code,
+            RoleJob.job_status == True,
+            RoleJob.job_code != DUMMY_JOB_CODE,
+            or_(RoleJob.occupied_by.is_(None), RoleJob.occupied_by == employee_number)
+        )
+        .order_by(RoleJob.job_code)
+    )
+    if prefix:
+        query = query.filter(or_(
+            RoleJob.job_code.startswith(prefix, autoescape=True),
+            RoleJob.job_name.startswith(prefix, autoescape=True)
+        ))
+    if limit is not None:
+        query = query.limit(limit)
+
+    return [{"job_code": job.job_code, "job_name": job.job_name} for job in query.all()]
+
+
+
 
 
 
 
 
+def unassigned_job(job_codes: List[str]):
+    """WHERE clause for the given codes that nobody holds or has claimed, the guard of every job write."""
+    return and_(
+        RoleJob.job_code.in_(job_codes),
+        RoleJob.occupied_by.is_(None),
+        ~exists().where(Employee.job_code == RoleJob.job_code)
+    )
+
+
+def job_holders(db: Session, job_codes: List[str]) -> List[dict]:
+    """Return [{"job_code", "employee_number"}] for the employees holding or having claimed any of the codes.
 
+    Claims reserve a code for employees that may not exist yet, so occupied_by
+    is read alongside employees.job_code.
+    """
+    holders = set()
+    for start in range(0, len(job_codes), 500):
+        chunk = job_codes[start:start + 500]
+        holders.update(
+            (row.job_code, row.employee_number)
+            for row in db.query(Employee.job_code, Employee.employee_number).filter(Employee.job_code.in_(chunk))
+        )
+        holders.update(
+            (row.job_code, row.occupied_by)
+            for row in db.query(RoleJob.job_code, RoleJob.occupied_by)
+            .filter(RoleJob.job_code.in_(chunk), RoleJob.occupied_by.isnot(None))
+        )
+    return [{"job_code": code, "employee_number": number} for code, number in sorted(holders)]
 
 
 @router.delete("/jobs")
 async def delete_jobs(delete_request: JobDeleteRequest, db: Session = Depends(get_db)):
-    
-    jobs = db.query(RoleJob)\
-        .filter(RoleJob.job_name == delete_request.job_name)\
-        .filter(RoleJob.role_code == delete_request.role_code)\
-        .order_by(RoleJob.job_code.desc())\
-        .limit(delete_request.count)\
-        .all()
-    
-    if not jobs:
+    job_codes = [
+        row.job_code for row in db.query(RoleJob.job_code)
+        .filter(RoleJob.job_name == delete_request.job_name)
+        .filter(RoleJob.role_code == delete_request.role_code)
+        .order_by(RoleJob.job_code.desc())
+        .limit(delete_request.count)
+    ]
+    if not job_codes:
         raise HTTPException(status_code=404, detail="No jobs found to delete")
-    
-    # Extract job codes
-    job_codes_to_delete = [job.job_code for job in jobs]
 
-    # Check if any employee uses these job codes
-    existing_employees = db.query(Employee)\
-        .filter(Employee.job_code.in_(job_codes_to_delete))\
-        .all()
-    
-    if existing_employees:
-        used_codes = list({emp.job_code for emp in existing_employees})
+    # codes still held by an employee are skipped and reported
+    deleted = 0
+    for start in range(0, len(job_codes), 500):
+        deleted += db.execute(
+            delete(RoleJob)
+            .where(unassigned_job(job_codes[start:start + 500]))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    blocked = job_holders(db, job_codes)
+    if not deleted:
+        db.rollback()
         raise HTTPException(
             status_code=400,
-            detail=f" to delete Job  Employees still Assigned to this Job"
+            detail="Cannot delete jobs, employees still assigned: "
+                   + ", ".join(f"{b['job_code']} ({b['employee_number']})" for b in blocked)
         )
-
-    # Safe to delete
-    for job in jobs:
-        db.delete(job)
-    
+    refresh_job_summary(db, [delete_request.role_code])
     db.commit()
-    
-    return {"message": f"Successfully deleted {len(jobs)} jobs"}
+    invalidate_all()
+
+    return {
+        "message": f"Successfully deleted {deleted} jobs",
+        "deleted": deleted,
+        "blocked": blocked
+    }
 
 
 
@@ -176,20 +475,25 @@ def get_jobs_by_role(role_code: str, job_name : str, db: Session = Depends(get_d
 
 @router.put("/jobs/deactivate", response_model=dict)
 def deactivate_jobs(job_codes: List[str], db: Session = Depends(get_db)):
-    # Check if job code is assigned to any employees
-    assigned_employees = db.query(Employee.employee_number).filter(Employee.job_code.in_(job_codes)).all()
-    
-    if assigned_employees:
-        res =assigned_employees[0].employee_number
+    # assigned codes stay active and are reported back
+    updated = 0
+    for start in range(0, len(job_codes), 500):
+        updated += db.execute(
+            update(RoleJob)
+            .where(unassigned_job(job_codes[start:start + 500]))
+            .values(job_status=False)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    blocked = job_holders(db, job_codes)
+    if blocked and not updated:
+        db.rollback()
         raise HTTPException(
             status_code=400,
-            detail=f"Error Cannot deactivate job. Job code is assigned to employee : {res}"
+            detail=f"Error Cannot deactivate job. Job code is assigned to employee : {blocked[0]['employee_number']}"
         )
-    updated = db.query(RoleJob).filter(RoleJob.job_code.in_(job_codes)).update(
-        {RoleJob.job_status: False}, synchronize_session=False
-    )
     db.commit()
-    return {"updated": updated, "status": "deactivated"}
+    invalidate_all()
+    return {"updated": updated, "status": "deactivated", "blocked": blocked}
 
 @router.put("/jobs/activate", response_model=dict)
 def activate_jobs(job_codes: List[str], db: Session = Depends(get_db)):
@@ -198,4 +502,5 @@ def activate_jobs(job_codes: List[str], db: Session = Depends(get_db)):
         {RoleJob.job_status: True}, synchronize_session=False
     )
     db.commit()
+    invalidate_all()
     return {"updated": updated, "status": "activated"}
@@ -3,7 +3,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import auth
 import competency
-from database import engine, Base
+from database import SessionLocal, engine
 import department
 from sqlalchemy.orm import Session
 import myscorestest
@@ -14,6 +14,10 @@ import employee
 import role
 import employeeCompetencyAssign
 import competecnyScore,employeeExcel,departmentRole,individualEmpComp,myscorestest,manager,job
+import competencyStats
+import importJobs
+import responseCache
+from migrations import run_migrations
 
 
 app = FastAPI()
@@ -28,11 +32,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all HTTP methods (GET, POST, etc.)
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Next-Cursor"],  # /employees/ paging cursor
 )
 
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create tables and apply pending schema migrations
+run_migrations(engine)
+
+# Build the stats rollup for databases that predate it
+with SessionLocal() as db:
+    competencyStats.ensure_competency_stats(db)
+
+# Fail imports left unfinished by a dead process and drop their spooled files
+importJobs.recover_import_jobs()
 
 
 
@@ -56,7 +68,7 @@ app.include_router(employeeSetEvaluation.router)
 
 app.include_router(competecnyScore.router)
 
-app.include_router(employeeExcel.router)
+app.include_router(importJobs.router)
 
 app.include_router(departmentRole.router)
 
@@ -68,6 +80,10 @@ app.include_router(manager.router)
 
 app.include_router(job.router)
 
+app.include_router(competencyStats.router)
+
+app.include_router(responseCache.router)
+
 
 
 
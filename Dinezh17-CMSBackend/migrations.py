@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import delete, func, insert, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from database import Base
+from job import DUMMY_JOB_CODE, JOB_SUMMARY_COLUMNS, job_summary_select
+from models import CompetencyStats, Employee, EmployeeCompetency, ImportJob, JobSummary, RoleJob, SchemaMigration, User
+
+
+# schema changes are applied in version order at startup and recorded in
+# schema_migrations, every step must also be safe on a database that
+# create_all has just built from the current models
+
+
+def _create_tables(conn: Connection) -> None:
+    Base.metadata.create_all(bind=conn)
+
+
+def _create_indexes(conn: Connection, table, names: List[str]) -> None:
+    for index in table.indexes:
+        if index.name in names:
+            index.create(bind=conn, checkfirst=True)
+
+
+def _add_hot_column_indexes(conn: Connection) -> None:
+    # keep the first row of every duplicated pair, it is the one the score
+    # endpoints have always updated
+    keep = (
+        select(func.min(EmployeeCompetency.employee_competencies_id))
+        .group_by(EmployeeCompetency.employee_number, EmployeeCompetency.competency_code)
+    )
+    removed = conn.execute(
+        delete(EmployeeCompetency).where(EmployeeCompetency.employee_competencies_id.not_in(keep))
+    ).rowcount
+    if removed:
+        # the rollup still counts the duplicates, empty it so startup rebuilds it
+        conn.execute(delete(CompetencyStats))
+
+    _create_indexes(conn, EmployeeCompetency.__table__, [
+        "uq_employee_competencies_employee_competency",
+        "ix_employee_competencies_competency_code",
+    ])
+    _create_indexes(conn, Employee.__table__, [
+        "ix_employees_reporting_to",
+        "ix_employees_role_id",
+        "ix_employees_department_id",
+        "ix_employees_evaluation_status",
+    ])
+    _create_indexes(conn, User.__table__, ["ix_users_employee_number"])
+
+
+def _add_job_indexes(conn: Connection) -> None:
+    _create_indexes(conn, Employee.__table__, ["ix_employees_job_code"])
+    _create_indexes(conn, RoleJob.__table__, ["ix_role_job_role_code"])
+
+
+def _add_job_occupancy(conn: Connection) -> None:
+    columns = {column["name"] for column in inspect(conn).get_columns("role_job")}
+    if "occupied_by" not in columns:
+        conn.execute(text("ALTER TABLE role_job ADD COLUMN occupied_by VARCHAR"))
+
+    # the shared dummy job is held by every placeholder manager, so it is never occupied
+    holder = (
+        select(func.min(Employee.employee_number))
+        .where(Employee.job_code == RoleJob.job_code)
+        .scalar_subquery()
+    )
+    conn.execute(
+        update(RoleJob)
+        .where(RoleJob.job_code != DUMMY_JOB_CODE)
+        .values(occupied_by=holder)
+    )
+    _create_indexes(conn, RoleJob.__table__, ["ix_role_job_occupied_by"])
+
+
+def _add_job_summary(conn: Connection) -> None:
+    JobSummary.__table__.create(bind=conn, checkfirst=True)
+    conn.execute(delete(JobSummary))
+    conn.execute(insert(JobSummary).from_select(JOB_SUMMARY_COLUMNS, job_summary_select()))
+
+
+def _add_import_jobs(conn: Connection) -> None:
+    ImportJob.__table__.create(bind=conn, checkfirst=True)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create tables", _create_tables),
+    (2, "hot column indexes", _add_hot_column_indexes),
+    (3, "job indexes", _add_job_indexes),
+    (4, "job occupancy", _add_job_occupancy),
+    (5, "job summary", _add_job_summary),
+    (6, "import jobs", _add_import_jobs),
+]
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        return list(conn.execute(select(SchemaMigration.version)).scalars())
+
+
+def run_migrations(engine: Engine, target: int = None) -> List[int]:
+    """Apply pending migrations up to target, one transaction each, and return their versions."""
+    applied = set(applied_versions(engine))
+    newly_applied = []
+    for version, name, migrate in MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                insert(SchemaMigration).values(version=version, name=name, applied_at=datetime.utcnow())
+            )
+        newly_applied.append(version)
+    return newly_applied
+
+
+
+
+# apply pending migrations from the command line:  python migrations.py
+if __name__ == "__main__":
+    from database import engine
+    print("applied migrations:", run_migrations(engine) or "none pending")
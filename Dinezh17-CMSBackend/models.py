@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Integer, Null, Sequence, String, ForeignKey
+from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Float, Index, Integer, Null, Sequence, String, ForeignKey
 from database import Base
 
 
@@ -7,7 +7,7 @@ from database import Base
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
-    employee_number = Column(String, ForeignKey("employees.employee_number"), nullable=True)
+    employee_number = Column(String, ForeignKey("employees.employee_number"), nullable=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     role = Column(String) 
@@ -19,12 +19,12 @@ class Employee(Base):
     __tablename__ = "employees"
     employee_number = Column(String, primary_key=True, index=True)
     employee_name = Column(String)
-    job_code = Column(String, ForeignKey("role_job.job_code"),nullable=True)
-    reporting_to = Column(String, ForeignKey("employees.employee_number"), nullable=True)
-    role_id = Column(Integer, ForeignKey("roles.id"))
-    department_id = Column(Integer, ForeignKey("departments.id"))
+    job_code = Column(String, ForeignKey("role_job.job_code"),nullable=True, index=True)
+    reporting_to = Column(String, ForeignKey("employees.employee_number"), nullable=True, index=True)
+    role_id = Column(Integer, ForeignKey("roles.id"), index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), index=True)
     sent_to_evaluation_by=Column(String,default="Not sent by anyone",nullable=True)
-    evaluation_status = Column(String ,nullable=True)
+    evaluation_status = Column(String ,nullable=True, index=True)
     evaluation_by = Column(String,default="Not evaluated", nullable=True)
     last_evaluated_date = Column(Date, nullable=True)
  
@@ -33,8 +33,10 @@ class RoleJob(Base):
     __tablename__ = "role_job"
     job_code = Column(String,primary_key=True, index=True)
     job_name = Column(String, index=True)
-    role_code = Column(String ,ForeignKey("roles.role_code"))
+    role_code = Column(String ,ForeignKey("roles.role_code"), index=True)
     job_status = Column(Boolean,default=True)
+    # employee holding the job, kept in step with employees.job_code by job.occupy_job / release_jobs
+    occupied_by = Column(String, nullable=True, unique=True, index=True)
 
 
 #tested
@@ -102,11 +104,83 @@ class JobCompetency(Base):
 
 class EmployeeCompetency(Base):
     __tablename__ = "employee_competencies"
+    __table_args__ = (
+        Index("uq_employee_competencies_employee_competency", "employee_number", "competency_code", unique=True),
+    )
     employee_competencies_id = Column(Integer, primary_key=True, autoincrement=True, index=True,)
     employee_number = Column(String, ForeignKey("employees.employee_number"))
-    competency_code = Column(String, ForeignKey("competencies.competency_code"))
+    competency_code = Column(String, ForeignKey("competencies.competency_code"), index=True)
     required_score = Column(Integer)
     actual_score = Column(Integer,default=0)
 
 
 
+
+
+
+# rollup of employee_competencies per competency x department x manager,
+# kept in sync by competencyStats.refresh_competency_stats
+class CompetencyStats(Base):
+    __tablename__ = "competency_stats"
+    id = Column(Integer, primary_key=True, index=True)
+    competency_code = Column(String, ForeignKey("competencies.competency_code"), index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"), index=True)
+    manager_number = Column(String, ForeignKey("employees.employee_number"), index=True)
+    total_count = Column(Integer, default=0)
+    required_count = Column(Integer, default=0)
+    required_sum = Column(Integer, default=0)
+    actual_count = Column(Integer, default=0)
+    actual_sum = Column(Integer, default=0)
+    meeting_required = Column(Integer, default=0)
+    gap1 = Column(Integer, default=0)
+    gap2 = Column(Integer, default=0)
+    gap3 = Column(Integer, default=0)
+    gap4 = Column(Integer, default=0)
+
+
+# rollup of role_job per role x job name for the jobs admin page,
+# kept in sync by job.refresh_job_summary
+class JobSummary(Base):
+    __tablename__ = "job_summary"
+    id = Column(Integer, primary_key=True, index=True)
+    role_code = Column(String, ForeignKey("roles.role_code"), index=True)
+    job_name = Column(String)
+    total_count = Column(Integer, default=0)
+    filled_count = Column(Integer, default=0)
+    last_code = Column(String)
+
+    __table_args__ = (
+        Index("uq_job_summary_role_job_name", "role_code", "job_name", unique=True),
+    )
+
+
+
+
+# background Excel imports, written by importJobs so any server process can answer a poll
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    id = Column(String, primary_key=True)
+    filename = Column(String)
+    status = Column(String, index=True)
+    stage = Column(String)
+    total_sheets = Column(Integer, nullable=True)
+    parsed_sheets = Column(Integer, default=0)
+    sheets_per_second = Column(Float, nullable=True)
+    employees_to_import = Column(Integer, nullable=True)
+    imported_employees = Column(Integer, default=0)
+    created_at = Column(DateTime)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(String, nullable=True)
+    summary = Column(JSON, nullable=True)
+    processed_employees = Column(JSON, nullable=True)
+    # "<host>:<pid>" of the process whose worker thread runs the job
+    owner = Column(String, nullable=True)
+
+
+# versions applied by migrations.run_migrations
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+    version = Column(Integer, primary_key=True)
+    name = Column(String)
+    applied_at = Column(DateTime)
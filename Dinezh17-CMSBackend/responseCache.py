@@ -0,0 +1,197 @@
+from collections import OrderedDict
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from fastapi import APIRouter, Depends
+from fastapi.encoders import jsonable_encoder
+from auth import hr_or_admin_required
+
+router = APIRouter()
+
+
+# per-employee cache of the score page responses, keyed "<namespace>:<employee_number>"
+# and dropped by the write paths through invalidate_employees / invalidate_all
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "local")  # local or redis
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 300))
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 5000))
+
+NAMESPACES = ["details", "stats-bar"]
+
+
+
+
+class LocalCacheBackend:
+    """In-process LRU with a TTL per entry."""
+
+    name = "local"
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Shared cache in Redis, values stored as JSON with the TTL set on the key."""
+
+    name = "redis"
+    prefix = "cms:response:"
+
+    def __init__(self, url: str, ttl_seconds: int):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the redis package installed") from e
+        self.ttl_seconds = ttl_seconds
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        self._client.set(self.prefix + key, json.dumps(value), ex=self.ttl_seconds)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = [self.prefix + key for key in keys]
+        if keys:
+            self._client.delete(*keys)
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(self.prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def size(self) -> int:
+        return sum(1 for _ in self._client.scan_iter(self.prefix + "*"))
+
+
+def create_cache_backend(kind: str = RESPONSE_CACHE_BACKEND):
+    if kind == "redis":
+        return RedisCacheBackend(RESPONSE_CACHE_URL, RESPONSE_CACHE_TTL_SECONDS)
+    return LocalCacheBackend(RESPONSE_CACHE_MAX_SIZE, RESPONSE_CACHE_TTL_SECONDS)
+
+
+_backend = create_cache_backend()
+_counters = {"hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+
+
+
+def cached(namespace: str, employee_number: str, loader: Callable[[], Any]) -> Any:
+    """Return the cached response for an employee, or build it with loader and store it.
+
+    Loaders raise for missing employees, so errors are never cached.
+    """
+    key = f"{namespace}:{employee_number}"
+    value = _backend.get(key)
+    with _counters_lock:
+        _counters["hits" if value is not None else "misses"] += 1
+    if value is not None:
+        return value
+
+    value = jsonable_encoder(loader())
+    _backend.set(key, value)
+    return value
+
+
+def cached_many(namespace: str, employee_numbers: Iterable[str],
+                loader: Callable[[List[str]], Dict[str, Any]]) -> Dict[str, Any]:
+    """Batch form of cached: loader gets the missed employee numbers and returns a map of them.
+
+    Employees the loader leaves out are left out of the result.
+    """
+    results = {}
+    missed = []
+    for number in dict.fromkeys(employee_numbers):
+        value = _backend.get(f"{namespace}:{number}")
+        if value is None:
+            missed.append(number)
+        else:
+            results[number] = value
+    with _counters_lock:
+        _counters["hits"] += len(results)
+        _counters["misses"] += len(missed)
+
+    if missed:
+        for number, value in loader(missed).items():
+            value = jsonable_encoder(value)
+            _backend.set(f"{namespace}:{number}", value)
+            results[number] = value
+    return results
+
+
+def invalidate_employees(employee_numbers: Iterable[str]) -> None:
+    """Drop every cached response of the employees, call after their data is committed."""
+    _backend.delete(
+        f"{namespace}:{number}" for number in set(employee_numbers) if number for namespace in NAMESPACES
+    )
+
+
+def invalidate_all() -> None:
+    """Drop every cached response, for writes that touch many employees at once."""
+    _backend.clear()
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _counters_lock:
+        hits, misses = _counters["hits"], _counters["misses"]
+    lookups = hits + misses
+    return {
+        "backend": _backend.name,
+        "entries": _backend.size(),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else None,
+        "ttl_seconds": RESPONSE_CACHE_TTL_SECONDS,
+    }
+
+
+
+
+@router.get("/cache/stats")
+def get_cache_stats(current_user: dict = Depends(hr_or_admin_required)):
+    return cache_stats()
+
+
+@router.post("/cache/clear")
+def clear_cache(current_user: dict = Depends(hr_or_admin_required)):
+    invalidate_all()
+    return {"message": "Response cache cleared"}
@@ -7,6 +7,7 @@ from fastapi import APIRouter
 from auth import get_current_user, hr_or_admin_required
 from database import get_db
 from models import Department, DepartmentRole, Employee, Role, RoleJob
+from responseCache import invalidate_all
 from schemas import RoleCreate, RoleCreateWithDepartment, RoleResponse
 
 
@@ -130,6 +131,7 @@ def update_role(role_id: int, role_data: RoleCreate, db: Session = Depends(get_d
     role.role_category = role_data.role_category.strip()
 
     db.commit()
+    invalidate_all()
     db.refresh(role)
 
     return role
@@ -149,7 +151,6 @@ def delete_role(role_id: int, db: Session = Depends(get_db), current_user: dict
             status_code=400,
             detail="to delete role. Employees are still assigned to this role."
         )
-    print(role.role_code)
     job =db.query(RoleJob.job_code).filter(RoleJob.role_code ==role.role_code ).first()
    
     if job:
@@ -160,6 +161,7 @@ def delete_role(role_id: int, db: Session = Depends(get_db), current_user: dict
     db.query(DepartmentRole).filter(DepartmentRole.role_id==role_id).delete(synchronize_session=False)
     db.delete(role)
     db.commit()
+    invalidate_all()
 
     return {"message": "Role deleted successfully"}
 
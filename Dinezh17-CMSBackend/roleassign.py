@@ -1,12 +1,14 @@
 
 from typing import List
 from fastapi import Depends, HTTPException
-from sqlalchemy import and_
+from sqlalchemy import case, exists, insert, literal, select, true
 from sqlalchemy.orm import Session
 from fastapi import APIRouter
 from auth import get_current_user, hr_or_admin_required
+from competencyStats import employee_stats_slices, refresh_competency_stats
 from database import get_db
 from models import Competency, Employee, EmployeeCompetency, Role, RoleCompetency
+from responseCache import invalidate_all
 from schemas import CompetencyScoreUpdate
 
 router = APIRouter()
@@ -14,6 +16,13 @@ router = APIRouter()
 
 
 
+def role_holders(role_id):
+    """Subquery of the employee numbers holding role_id, for IN filters."""
+    return select(Employee.employee_number).where(Employee.role_id == role_id)
+
+
+
+
 
 
 
@@ -58,37 +67,45 @@ def assign_competencies_to_role(
         )
 
     # 5. Create new RoleCompetency assignments
-    for comp_code in new_codes:
-        db.add(RoleCompetency(
-            role_id=role_id,
-            competency_code=comp_code,
-            role_competency_required_score=3  # default required score
-        ))
-    db.commit()
-
-    role.assigned_comp_count= db.query(RoleCompetency).filter(RoleCompetency.role_id==role_id).count()
-    # 6. Reflect changes in EmployeeCompetency
-    # Get all employees with this role
-    employees = db.query(Employee).filter(Employee.role_id == role_id).all()
-
-    # For each new competency, update employees
-    for comp_code in new_codes:
-       
-        for emp in employees:
-            # Check if already exists
-            existing = db.query(EmployeeCompetency).filter_by(
-                employee_number=emp.employee_number,
-                competency_code=comp_code
-            ).first()
-            if not existing:
-                # Create EmployeeCompetency
-                db.add(EmployeeCompetency(
-                    employee_number=emp.employee_number,
-                    competency_code=comp_code,
-                    required_score=3,
-                    actual_score=0
-                ))
+    db.execute(insert(RoleCompetency), [
+        {
+            "role_id": role_id,
+            "competency_code": comp_code,
+            "role_competency_required_score": 3  # default required score
+        }
+        for comp_code in new_codes
+    ])
+    # new_codes excludes the existing ones, so the sum is the new total
+    role.assigned_comp_count = len(existing_codes) + len(new_codes)
+
+    # 6. Reflect changes in EmployeeCompetency: one INSERT ... SELECT of every
+    # (holder, new competency) pair the employee does not have yet
+    missing_pairs = (
+        select(
+            Employee.employee_number,
+            Competency.competency_code,
+            literal(3),
+            literal(0)
+        )
+        .join(Competency, true())  # every holder x every new competency
+        .where(
+            Employee.role_id == role_id,
+            Competency.competency_code.in_(new_codes),
+            ~exists().where(
+                EmployeeCompetency.employee_number == Employee.employee_number,
+                EmployeeCompetency.competency_code == Competency.competency_code
+            )
+        )
+    )
+    db.execute(
+        insert(EmployeeCompetency).from_select(
+            ["employee_number", "competency_code", "required_score", "actual_score"],
+            missing_pairs
+        )
+    )
+    refresh_competency_stats(db, employee_stats_slices(db, Employee.role_id == role_id))
     db.commit()
+    invalidate_all()
 
 
 
@@ -135,18 +152,16 @@ def remove_competencies_from_role(
         )
 
     # 3. Delete from EmployeeCompetency for employees with this role
-    employee_numbers = db.query(Employee.employee_number).filter(
-        Employee.role_id == editing_role_id
-    ).all()
-    employee_numbers = [e.employee_number for e in employee_numbers]
-
-    if employee_numbers:
+    slices = employee_stats_slices(db, Employee.role_id == editing_role_id)
+    if slices:
         db.query(EmployeeCompetency).filter(
-            EmployeeCompetency.employee_number.in_(employee_numbers),
+            EmployeeCompetency.employee_number.in_(role_holders(editing_role_id)),
             EmployeeCompetency.competency_code.in_(competency_codes)
         ).delete(synchronize_session=False)
+        refresh_competency_stats(db, slices)
 
     db.commit()
+    invalidate_all()
     return competency_codes
 
 
@@ -199,38 +214,38 @@ def update_role_competency_scores(
         print(1)
         raise HTTPException(status_code=404, detail="Role not found")
 
-    # 2. Get employees for this role
-    employees = db.query(Employee.employee_number).filter(
-        Employee.role_id == role_id
-    ).all()
-    employee_numbers = [e.employee_number for e in employees]
-
-    # 3. Update each competency score in RoleCompetency and EmployeeCompetency
-    updated_count = 0
-    for update in competency_updates:
-        # Update RoleCompetency
-        role_comp = db.query(RoleCompetency).filter(
-            and_(
-                RoleCompetency.role_id == role_id,
-                RoleCompetency.competency_code == update.competency_code
-            )
-        ).first()
-
-        if role_comp:
-            role_comp.role_competency_required_score = update.role_competency_required_score
-            updated_count += 1
-
-            # Update required_score in EmployeeCompetency for all related employees
-            db.query(EmployeeCompetency).filter(
-                EmployeeCompetency.employee_number.in_(employee_numbers),
-                EmployeeCompetency.competency_code == update.competency_code
-            ).update(
-                {EmployeeCompetency.required_score: update.role_competency_required_score},
-                synchronize_session=False
-            )
+    # 2. Competencies of the role named in the request
+    scores = {update.competency_code: update.role_competency_required_score for update in competency_updates}
+    assigned = {
+        rc.competency_code
+        for rc in db.query(RoleCompetency.competency_code).filter(
+            RoleCompetency.role_id == role_id,
+            RoleCompetency.competency_code.in_(scores)
+        ).all()
+    }
+    updated_count = sum(1 for update in competency_updates if update.competency_code in assigned)
 
     if updated_count == 0:
         raise HTTPException(status_code=404, detail="No matching competencies found for this role")
 
+    # 3. One CASE update for the role and one for every holder of the role
+    required_score = {code: scores[code] for code in assigned}
+    db.query(RoleCompetency).filter(
+        RoleCompetency.role_id == role_id,
+        RoleCompetency.competency_code.in_(assigned)
+    ).update(
+        {RoleCompetency.role_competency_required_score: case(required_score, value=RoleCompetency.competency_code)},
+        synchronize_session=False
+    )
+    db.query(EmployeeCompetency).filter(
+        EmployeeCompetency.employee_number.in_(role_holders(role_id)),
+        EmployeeCompetency.competency_code.in_(assigned)
+    ).update(
+        {EmployeeCompetency.required_score: case(required_score, value=EmployeeCompetency.competency_code)},
+        synchronize_session=False
+    )
+
+    refresh_competency_stats(db, employee_stats_slices(db, Employee.role_id == role_id))
     db.commit()
+    invalidate_all()
     return {"message": f"Updated scores for {updated_count} competencies"}
@@ -45,7 +45,7 @@ class CreateJobsRequest(BaseModel):
     role_code: str
     job_name: str
     prefix: str
-    start: int
+    start: Optional[int] = None  # next number after the prefix's highest code when omitted
     count: int
 #comp schemas
 
@@ -175,6 +175,21 @@ class BulkEvaluationStatusUpdate(BaseModel):
 
 
 
+class EvaluationScore(BaseModel):
+    competency_code: str
+    actual_score: int
+
+class EvaluationSubmission(BaseModel):
+    scores: List[EvaluationScore]
+
+class EmployeeEvaluation(EvaluationSubmission):
+    employee_number: str
+
+class BatchEvaluationSubmission(BaseModel):
+    evaluations: List[EmployeeEvaluation]
+
+
+
     
 
 
@@ -214,6 +229,13 @@ class JobDeleteRequest(BaseModel):
 
 
 
+class JobClaimRequest(BaseModel):
+    role_code: str
+    employee_number: str
+    job_name: Optional[str] = None
+
+
+
 
 
 
@@ -1,3 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+from typing import List
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt
@@ -10,6 +13,10 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL while hashing, so bulk provisioning hashes on a
+# thread pool with one worker per core by default
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
 
 
 
@@ -20,6 +27,20 @@ def get_password_hash(password: str):
 
 
 
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Hash many passwords in parallel, results keep the input order."""
+    workers = min(PASSWORD_HASH_WORKERS, len(passwords))
+    if workers <= 1:
+        return [get_password_hash(password) for password in passwords]
+
+    # hash the first one inline so passlib loads its bcrypt backend only once
+    first = get_password_hash(passwords[0])
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [first, *pool.map(get_password_hash, passwords[1:])]
+
+
+
+
 
 
 
@@ -1,55 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import asc, case, func
+from sqlalchemy import and_, asc, func, or_, select
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any, Optional
 from auth import get_current_user
-from database import get_db
-from models import Department, Employee, EmployeeCompetency, Competency, RoleCompetency
+from database import SessionLocal, get_db
+from models import CompetencyStats, Department, Employee, EmployeeCompetency, Competency, RoleCompetency
 
 router = APIRouter()
 
 
+def _competency_rollup(db: Session, *criteria):
+    """Per competency averages and counts summed from the competency_stats rollup."""
+    return (
+        db.query(
+            Competency.competency_code,
+            Competency.competency_name,
+            Competency.competency_description,
+            (func.sum(CompetencyStats.required_sum) * 1.0 / func.nullif(func.sum(CompetencyStats.required_count), 0)).label("average_required_score"),
+            (func.sum(CompetencyStats.actual_sum) * 1.0 / func.nullif(func.sum(CompetencyStats.actual_count), 0)).label("average_score"),
+            func.sum(CompetencyStats.meeting_required).label("meeting_required"),
+            func.sum(CompetencyStats.total_count).label("total_evaluations"),
+        )
+        .join(
+            CompetencyStats,
+            CompetencyStats.competency_code == Competency.competency_code
+        )
+        .filter(*criteria)
+        .group_by(Competency.competency_code)
+        .order_by(Competency.competency_code)
+        .all()
+    )
+
+
+
 @router.get("/fetch-all-competency-score-data")
 def get_competency_gap_data(db: Session = Depends(get_db)):
-   
-    competencies = db.query(Competency).all()
-    result = []
 
-    for comp in competencies:
-        gap1 = 0
-        gap2 = 0
-        gap3 = 0
-        gap4=0
-        # Get all employee competencies for this competency
-        records = db.query(EmployeeCompetency).join(Employee, Employee.employee_number == EmployeeCompetency.employee_number).filter(
-            EmployeeCompetency.competency_code == comp.competency_code,
-            Employee.evaluation_status == "True"  # or .ilike("true") for case-insensitive match
-        ).all()
-
-
-        for record in records:
-            if record.required_score is not None and record.actual_score is not None:
-                gap = record.required_score - record.actual_score
-                if gap == 1:
-                    gap1 += 1
-                elif gap == 2:
-                    gap2 += 1
-                elif gap == 3:
-                    gap3 += 1
-                elif gap == 4:
-                    gap4 += 1
-                    
+    # gap buckets are precomputed per slice in competency_stats
+    def gap_bucket(column):
+        return func.coalesce(func.sum(column), 0)
 
+    gap_stats = (
+        db.query(
+            Competency.competency_code,
+            Competency.competency_name,
+            Competency.competency_description,
+            gap_bucket(CompetencyStats.gap1).label("gap1"),
+            gap_bucket(CompetencyStats.gap2).label("gap2"),
+            gap_bucket(CompetencyStats.gap3).label("gap3"),
+            gap_bucket(CompetencyStats.gap4).label("gap4"),
+        )
+        .outerjoin(
+            CompetencyStats,
+            CompetencyStats.competency_code == Competency.competency_code
+        )
+        .group_by(Competency.competency_code)
+        .order_by(Competency.competency_code)
+        .all()
+    )
+
+    result = []
+    for comp in gap_stats:
         result.append({
             "competencyCode": comp.competency_code,
             "competencyName": comp.competency_name,
-            "classification":comp.competency_description,
-            "gap1": gap1,
-            "gap2": gap2,
-            "gap3": gap3,
-            "gap4": gap4,
-            "totalGapEmployees": gap1 + gap2 + gap3+gap4
+            "classification": comp.competency_description,
+            "gap1": comp.gap1,
+            "gap2": comp.gap2,
+            "gap3": comp.gap3,
+            "gap4": comp.gap4,
+            "totalGapEmployees": comp.gap1 + comp.gap2 + comp.gap3 + comp.gap4
         })
     result.sort(key=lambda x: x["totalGapEmployees"], reverse=True)
 
@@ -57,12 +82,10 @@ def get_competency_gap_data(db: Session = Depends(get_db)):
 
 
 
-@router.get("/employee-competencies/details")
-def get_all_employee_competency_details(
-    db: Session = Depends(get_db),
-):
-    results = (
-        db.query(
+def _competency_details_query(after_employee: Optional[str] = None, after_competency: Optional[str] = None):
+    """Evaluated employee x competency rows ordered by the (employee_number, competency_code) key."""
+    query = (
+        select(
             Employee.employee_number,
             Employee.employee_name,
             Employee.evaluation_status,
@@ -71,26 +94,115 @@ def get_all_employee_competency_details(
             Competency.competency_description.label("competency_description"),
             EmployeeCompetency.required_score,
             EmployeeCompetency.actual_score
-        ).filter(Employee.evaluation_status=="True")
+        )
+        .select_from(EmployeeCompetency)
         .join(Employee, Employee.employee_number == EmployeeCompetency.employee_number)
         .join(Competency, Competency.competency_code == EmployeeCompetency.competency_code)
-        .order_by(asc(Employee.employee_number))
-        .all()
+        .where(Employee.evaluation_status == "True")
+        .order_by(asc(EmployeeCompetency.employee_number), asc(EmployeeCompetency.competency_code))
     )
 
-    return [
-        {
-            "employeeNumber": r.employee_number,
-            "employeeName": r.employee_name,
-            "competencyCode": r.competency_code,
-            "competencyName": r.competency_name,
-            "competencyDescription": r.competency_description,
-            "requiredScore": r.required_score,
-            "actualScore": r.actual_score if r.evaluation_status == "True" else "-",
-            "gap": (r.required_score - r.actual_score) if r.evaluation_status == "True" else "-"
-        }
-        for r in results
-    ]
+    # keyset cursor, resume strictly after the last row of the previous page
+    if after_employee is not None:
+        query = query.where(
+            or_(
+                EmployeeCompetency.employee_number > after_employee,
+                and_(
+                    EmployeeCompetency.employee_number == after_employee,
+                    EmployeeCompetency.competency_code > (after_competency or "")
+                )
+            )
+        )
+    return query
+
+
+def _competency_detail_row(r) -> Dict[str, Any]:
+    return {
+        "employeeNumber": r.employee_number,
+        "employeeName": r.employee_name,
+        "competencyCode": r.competency_code,
+        "competencyName": r.competency_name,
+        "competencyDescription": r.competency_description,
+        "requiredScore": r.required_score,
+        "actualScore": r.actual_score if r.evaluation_status == "True" else "-",
+        "gap": (r.required_score - r.actual_score) if r.evaluation_status == "True" else "-"
+    }
+
+
+@router.get("/employee-competencies/details")
+def get_all_employee_competency_details(
+    db: Session = Depends(get_db),
+):
+    results = db.execute(_competency_details_query())
+
+    return [_competency_detail_row(r) for r in results]
+
+
+
+
+@router.get("/employee-competencies/details/page")
+def get_employee_competency_details_page(
+    after_employee: Optional[str] = Query(None),
+    after_competency: Optional[str] = Query(None),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    results = db.execute(_competency_details_query(after_employee, after_competency).limit(limit)).all()
+
+    next_cursor = None
+    if len(results) == limit:
+        last = results[-1]
+        next_cursor = {"after_employee": last.employee_number, "after_competency": last.competency_code}
+
+    return {
+        "items": [_competency_detail_row(r) for r in results],
+        "next_cursor": next_cursor
+    }
+
+
+
+
+DETAIL_EXPORT_FIELDS = [
+    "employeeNumber", "employeeName", "competencyCode", "competencyName",
+    "competencyDescription", "requiredScore", "actualScore", "gap"
+]
+
+
+def _stream_competency_details(export_format: str) -> Iterator[str]:
+    # the request session is closed before the body is sent, so the
+    # generator owns its session and reads through a server side cursor
+    db = SessionLocal()
+    try:
+        rows = db.execute(_competency_details_query().execution_options(yield_per=1000))
+
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=DETAIL_EXPORT_FIELDS)
+            writer.writeheader()
+            for r in rows:
+                writer.writerow(_competency_detail_row(r))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            yield buffer.getvalue()
+        else:
+            for r in rows:
+                yield json.dumps(_competency_detail_row(r)) + "\n"
+    finally:
+        db.close()
+
+
+@router.get("/employee-competencies/details/export")
+def export_employee_competency_details(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+):
+    if format == "csv":
+        return StreamingResponse(
+            _stream_competency_details("csv"),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=employee_competencies.csv"}
+        )
+    return StreamingResponse(_stream_competency_details("ndjson"), media_type="application/x-ndjson")
 
 @router.get("/score-emp-details/by-competency/{compcode}")
 def get_employee_gaps_by_competency(
@@ -169,33 +281,7 @@ def get_competency_by_department_stats(
     result = {}
     
     # Get all competencies with their average scores for this department
-    competency_stats = (
-        db.query(
-            Competency.competency_code,
-            Competency.competency_name,
-            Competency.competency_description,
-            func.avg(EmployeeCompetency.required_score).label("competency_required_score"),
-            func.avg(EmployeeCompetency.actual_score).label("average_score"),
-            func.sum(
-                case(
-                    (EmployeeCompetency.actual_score >= EmployeeCompetency.required_score, 1),
-                    else_=0
-                )
-            ).label("meeting_required"),
-            func.count(EmployeeCompetency.employee_competencies_id).label("total_evaluations"),
-        )
-        .join(
-            EmployeeCompetency,
-            EmployeeCompetency.competency_code == Competency.competency_code
-        )
-        .join(
-            Employee,
-            Employee.employee_number == EmployeeCompetency.employee_number
-        )
-        .filter(Employee.department_id == department_id)  # Filter by department code
-        .group_by(Competency.competency_code)
-        .all()
-    )
+    competency_stats = _competency_rollup(db, CompetencyStats.department_id == department_id)
     
     # Format department competency stats
     competencies_list = []
@@ -207,7 +293,7 @@ def get_competency_by_department_stats(
             "competency_code": comp_stat.competency_code,
             "competency_name": comp_stat.competency_name,
             "description": comp_stat.competency_description,
-            "average_required_score": comp_stat.competency_required_score,
+            "average_required_score": comp_stat.average_required_score,
             "average_score": round(comp_stat.average_score, 2),
             "fulfillment_rate": round(fulfillment_rate, 2),
             "employees_evaluated": comp_stat.total_evaluations,
@@ -265,33 +351,7 @@ def get_competency_by_department_stats(
     result = {}
     
     # Get all competencies with their average scores for this department
-    competency_stats = (
-        db.query(
-            Competency.competency_code,
-            Competency.competency_name,
-            Competency.competency_description,
-            func.avg(EmployeeCompetency.required_score).label("competency_required_score"),
-            func.avg(EmployeeCompetency.actual_score).label("average_score"),
-            func.sum(
-                case(
-                    (EmployeeCompetency.actual_score >= EmployeeCompetency.required_score, 1),
-                    else_=0
-                )
-            ).label("meeting_required"),
-            func.count(EmployeeCompetency.employee_competencies_id).label("total_evaluations"),
-        )
-        .join(
-            EmployeeCompetency,
-            EmployeeCompetency.competency_code == Competency.competency_code
-        )
-        .join(
-            Employee,
-            Employee.employee_number == EmployeeCompetency.employee_number
-        )
-        .filter(Employee.reporting_to == manager_number)  # Filter by manger code  code
-        .group_by(Competency.competency_code)
-        .all()
-    )
+    competency_stats = _competency_rollup(db, CompetencyStats.manager_number == manager_number)
     
     # Format manger wise  competency stats
     competencies_list = []
@@ -303,7 +363,7 @@ def get_competency_by_department_stats(
             "competency_code": comp_stat.competency_code,
             "competency_name": comp_stat.competency_name,
             "description": comp_stat.competency_description,
-            "average_required_score": comp_stat.competency_required_score,
+            "average_required_score": comp_stat.average_required_score,
             "average_score": round(comp_stat.average_score, 2),
             "fulfillment_rate": round(fulfillment_rate, 2),
             "employees_evaluated": comp_stat.total_evaluations,
@@ -376,28 +436,7 @@ def get_overall_competency_performance(db: Session = Depends(get_db),
     across the entire organization.
     """
     # Query to calculate statistics for each competency across all departments
-    competency_stats = (
-        db.query(
-            Competency.competency_code,
-            Competency.competency_name,
-            Competency.competency_description,
-            func.avg(EmployeeCompetency.required_score).label("average_required_score"),
-            func.avg(EmployeeCompetency.actual_score).label("average_score"),
-            func.count(EmployeeCompetency.employee_competencies_id).label("total_evaluations"),
-            func.sum(
-                case(
-                    (EmployeeCompetency.actual_score >= EmployeeCompetency.required_score, 1),
-                    else_=0
-                )
-            ).label("meeting_required")
-        )
-        .join(
-            EmployeeCompetency,
-            EmployeeCompetency.competency_code == Competency.competency_code
-        )
-        .group_by(Competency.competency_code)
-        .all()
-    )
+    competency_stats = _competency_rollup(db)
     
     # Process and rank the results 
     result = []
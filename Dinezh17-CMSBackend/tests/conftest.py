@@ -0,0 +1,119 @@
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+import pytest
+
+# point the app at a scratch database before anything imports database.py,
+# the tracked test.db must never be migrated or written by the suite
+_scratch_dir = tempfile.mkdtemp(prefix="cms-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_scratch_dir}/test.db"
+os.environ["IMPORT_SPOOL_DIR"] = os.path.join(_scratch_dir, "import_spool")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import auth
+import main
+import responseCache
+from database import Base, SessionLocal, engine
+from migrations import run_migrations
+from models import (
+    Competency, Department, DepartmentRole, Employee, EmployeeCompetency, Role, RoleCompetency, RoleJob, User
+)
+from security import create_access_token
+
+ROLE_CODE = "LCSFNC01"
+MANAGER = "M0001"
+COMPETENCIES = ["CBP 01", "CBP 02", "CBP 03"]
+
+
+def reset_db() -> None:
+    """Empty and re-migrate the scratch database and drop every cached response and user."""
+    Base.metadata.drop_all(bind=engine)
+    run_migrations(engine)
+    responseCache.invalidate_all()
+    with auth._user_cache_lock:
+        auth._user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_db():
+    """Every test starts from an empty, fully migrated database and cold caches."""
+    reset_db()
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    return TestClient(main.app)
+
+
+def auth_header(employee_number: str, role: str) -> dict:
+    token = create_access_token({"sub": employee_number, "role": role}, timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_org(db, employee_count: int = 4, job_count: int = 10) -> dict:
+    """One department and role with jobs and competencies, a manager and their direct reports.
+
+    The manager and the first employee_count jobs are occupied, the rest stay free.
+    """
+    department = Department(name="HLM")
+    role = Role(role_code=ROLE_CODE, role_name="Functional", role_category="Staff", assigned_comp_count=len(COMPETENCIES))
+    db.add_all([department, role])
+    db.flush()
+    db.add(DepartmentRole(department_id=department.id, role_id=role.id))
+    db.add_all(Competency(competency_code=code, competency_name=code, competency_description=code) for code in COMPETENCIES)
+    db.add_all(
+        RoleCompetency(role_id=role.id, competency_code=code, role_competency_required_score=3) for code in COMPETENCIES
+    )
+    jobs = [f"{ROLE_CODE}{str(i).zfill(4)}" for i in range(1, job_count + 1)]
+    db.add_all(RoleJob(job_code=code, job_name="Officer", role_code=ROLE_CODE, job_status=True) for code in jobs)
+    db.flush()
+
+    employees = [MANAGER] + [f"E{str(i).zfill(4)}" for i in range(1, employee_count + 1)]
+    for number, job_code in zip(employees, jobs):
+        db.add(Employee(
+            employee_number=number,
+            employee_name=f"Employee {number}",
+            job_code=job_code,
+            reporting_to=None if number == MANAGER else MANAGER,
+            role_id=role.id,
+            department_id=department.id
+        ))
+        db.query(RoleJob).filter(RoleJob.job_code == job_code).update({"occupied_by": number})
+        db.add(User(
+            employee_number=number,
+            email=f"{number}@company.com",
+            hashed_password="x",
+            role="Manager" if number == MANAGER else "Employee"
+        ))
+        db.add_all(
+            EmployeeCompetency(employee_number=number, competency_code=code, required_score=3, actual_score=0)
+            for code in COMPETENCIES
+        )
+    db.commit()
+
+    # the seed bypasses the API, so build both rollups from scratch
+    from competencyStats import rebuild_competency_stats
+    from job import rebuild_job_summary
+    rebuild_competency_stats(db)
+    rebuild_job_summary(db)
+    return {
+        "department_id": department.id,
+        "role_id": role.id,
+        "employees": employees,
+        "jobs": jobs,
+        "free_jobs": jobs[len(employees):],
+    }
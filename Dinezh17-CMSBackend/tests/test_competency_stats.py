@@ -0,0 +1,69 @@
+from conftest import MANAGER, auth_header, seed_org
+from competencyStats import STATS_COLUMNS, rebuild_competency_stats
+from models import CompetencyStats
+
+
+def stats_rows(db):
+    db.expire_all()
+    return sorted(
+        (tuple(getattr(row, column.key) for column in STATS_COLUMNS) for row in db.query(CompetencyStats)),
+        key=repr
+    )
+
+
+def assert_matches_rebuild(db):
+    """The incrementally maintained rollup must equal one rebuilt from scratch."""
+    incremental = stats_rows(db)
+    rebuild_competency_stats(db)
+    assert incremental == stats_rows(db)
+
+
+def test_stats_follow_employee_insert(client, db):
+    org = seed_org(db)
+    response = client.post("/employees/", headers=auth_header(MANAGER, "ADMIN"), json={
+        "employee_number": "E0100",
+        "employee_name": "New starter",
+        "job_code": org["free_jobs"][0],
+        "reporting_to": MANAGER,
+        "role_id": org["role_id"],
+        "department_id": org["department_id"]
+    })
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+
+
+def test_stats_follow_evaluations(client, db):
+    seed_org(db)
+    manager = auth_header(MANAGER, "Manager")
+    response = client.post("/evaluations/E0001", headers=manager, json={
+        "scores": [{"competency_code": "CBP 01", "actual_score": 2}, {"competency_code": "CBP 02", "actual_score": 4}]
+    })
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+
+    response = client.post("/evaluations/batch", headers=manager, json={"evaluations": [
+        {"employee_number": "E0002", "scores": [{"competency_code": "CBP 03", "actual_score": 1}]},
+        {"employee_number": "E0003", "scores": [{"competency_code": "CBP 01", "actual_score": 3}]}
+    ]})
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+
+
+def test_stats_follow_competency_assignment(client, db):
+    seed_org(db)
+    admin = auth_header(MANAGER, "ADMIN")
+    response = client.post("/competency", headers=admin, json={
+        "competency_code": "CBP 09", "competency_name": "Extra", "competency_description": "Extra"
+    })
+    assert response.status_code == 200, response.text
+    response = client.post("/assign-employees/E0001/competencies", headers=admin, json=["CBP 09"])
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+
+
+def test_stats_follow_employee_delete(client, db):
+    seed_org(db)
+    response = client.delete("/employees/E0004", headers=auth_header(MANAGER, "ADMIN"))
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+    assert all(row[2] != "E0004" for row in stats_rows(db))
@@ -0,0 +1,81 @@
+from io import BytesIO
+
+import pytest
+from openpyxl import Workbook
+
+import employeeExcel
+from conftest import MANAGER, ROLE_CODE, reset_db, seed_org
+from models import Employee, EmployeeCompetency, RoleJob, User
+
+
+def write_sheet(worksheet, employee_number, job_code, department="HLM", role_code=ROLE_CODE, scores=(2, 3, 4)):
+    worksheet.append(["Employee Number", employee_number, None, "Employee Name", f"Imported {employee_number}"])
+    worksheet.append(["Job Code", job_code])
+    worksheet.append([None, "Reporting Employee Number", MANAGER])
+    worksheet.append(["Role Code", role_code, "Department & Cost Centre", department])
+    worksheet.append(["Competencies", "RPL/APL", None, "RPL/APL"])
+    for i, score in enumerate(scores, start=1):
+        worksheet.append([f"competency {i}, description", f"CBP 0{i}", f"{score}/4"])
+    worksheet.append(["Managing Points", "ignored"])
+
+
+def build_workbook(free_jobs) -> bytes:
+    """New hires on the free jobs, an update of an existing employee and two sheets that fail."""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for i, job_code in enumerate(free_jobs):
+        write_sheet(workbook.create_sheet(f"New {i}"), f"N{str(i).zfill(4)}", job_code)
+    write_sheet(workbook.create_sheet("Update"), "E0001", f"{ROLE_CODE}0002", scores=(4, 4, 1))
+    write_sheet(workbook.create_sheet("Bad department"), "N9000", free_jobs[0], department="Nowhere")
+    write_sheet(workbook.create_sheet("Unparsable"), "N9001", free_jobs[0], role_code=None)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def table_rows(db, model, key):
+    db.expire_all()
+    columns = [column.key for column in model.__table__.columns if column.key not in ("id", "employee_competencies_id")]
+    return sorted(tuple(getattr(row, column) for column in columns) for row in db.query(model).order_by(key))
+
+
+def import_snapshot(db, workers, monkeypatch):
+    """Import the workbook into a freshly seeded database and return every table the import writes."""
+    reset_db()
+    org = seed_org(db, job_count=14)
+    monkeypatch.setattr(employeeExcel, "IMPORT_PARSE_WORKERS", workers)
+    results = employeeExcel.extract_employee_data_from_excel(build_workbook(org["free_jobs"]), db)
+    return {
+        "results": results,
+        "employees": table_rows(db, Employee, Employee.employee_number),
+        "competencies": table_rows(db, EmployeeCompetency, EmployeeCompetency.employee_number),
+        "jobs": table_rows(db, RoleJob, RoleJob.job_code),
+        "users": sorted((user.employee_number, user.email, user.role) for user in db.query(User)),
+    }
+
+
+@pytest.fixture
+def small_pool_chunks(monkeypatch):
+    # let a test-sized workbook spread over several parse workers
+    monkeypatch.setattr(employeeExcel, "MIN_SHEETS_PER_PARSE_WORKER", 2)
+
+
+def test_parse_workbook_same_with_and_without_pool(db, small_pool_chunks):
+    org = seed_org(db, job_count=14)
+    workbook = build_workbook(org["free_jobs"])
+
+    single = employeeExcel.parse_workbook(workbook, workers=1)
+    pooled = employeeExcel.parse_workbook(workbook, workers=4)
+
+    assert pooled == single
+    assert [employee["EmployeeNumber"] for employee in single][-2:] == ["E0001", "N9000"]
+
+
+def test_import_same_with_and_without_pool(db, small_pool_chunks, monkeypatch):
+    single = import_snapshot(db, 1, monkeypatch)
+    pooled = import_snapshot(db, 4, monkeypatch)
+
+    assert pooled == single
+    statuses = [result["status"] for result in single["results"]]
+    assert statuses.count("failed") == 1
+    assert len(statuses) == 11
@@ -0,0 +1,43 @@
+import pytest
+
+from conftest import MANAGER, auth_header, seed_org
+
+
+def fetch_all_pages(client, limit, **filters):
+    """Follow X-Next-Cursor from the first page until the listing runs out."""
+    headers = auth_header(MANAGER, "ADMIN")
+    pages = []
+    params = {"limit": limit, **filters}
+    while True:
+        response = client.get("/employees/", headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        page = [row["employee_number"] for row in response.json()]
+        assert len(page) <= limit
+        pages.append(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        assert cursor == page[-1]
+        params["after"] = cursor
+
+
+# 22 employees: a remainder page, an exact fit that ends on an empty page, and one page
+@pytest.mark.parametrize("limit", [5, 11, 50])
+def test_cursor_pages_have_no_gaps_or_duplicates(client, db, limit):
+    seed_org(db, employee_count=21, job_count=30)
+    headers = auth_header(MANAGER, "ADMIN")
+    everyone = [row["employee_number"] for row in client.get("/employees/", headers=headers).json()]
+    assert len(everyone) == 22
+
+    pages = fetch_all_pages(client, limit)
+
+    assert [number for page in pages for number in page] == sorted(everyone)
+
+
+def test_cursor_pages_with_filter(client, db):
+    seed_org(db, employee_count=21, job_count=30)
+
+    pages = fetch_all_pages(client, 4, reporting_to=MANAGER)
+
+    paged = [number for page in pages for number in page]
+    assert paged == [f"E{str(i).zfill(4)}" for i in range(1, 22)]
@@ -0,0 +1,58 @@
+import threading
+
+from conftest import ROLE_CODE, seed_org
+from database import SessionLocal
+from job import claim_next_job, occupy_job
+from models import RoleJob
+
+
+def run_concurrently(work, employee_numbers):
+    """Run work(session, employee_number) on one thread and session per employee, all released together."""
+    barrier = threading.Barrier(len(employee_numbers))
+    results = {}
+
+    def worker(employee_number):
+        session = SessionLocal()
+        try:
+            barrier.wait()
+            results[employee_number] = work(session, employee_number)
+            session.commit()
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in employee_numbers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # a worker that raised leaves no result behind
+    assert sorted(results) == sorted(employee_numbers)
+    return results
+
+
+def test_concurrent_occupy_of_one_job_has_one_winner(db):
+    org = seed_org(db)
+    job_code = org["free_jobs"][0]
+
+    results = run_concurrently(lambda session, number: occupy_job(session, job_code, number), ["C0001", "C0002"])
+
+    winners = [number for number, occupied in results.items() if occupied]
+    assert len(winners) == 1
+    db.expire_all()
+    assert db.get(RoleJob, job_code).occupied_by == winners[0]
+
+
+def test_concurrent_claims_never_share_a_job(db):
+    org = seed_org(db)
+    claimers = [f"C{str(i).zfill(4)}" for i in range(1, 9)]
+
+    results = run_concurrently(lambda session, number: claim_next_job(session, ROLE_CODE, number), claimers)
+
+    claimed = [code for code in results.values() if code is not None]
+    # every free job is handed out exactly once and the losers are told the role is full
+    assert sorted(claimed) == org["free_jobs"]
+    assert list(results.values()).count(None) == len(claimers) - len(org["free_jobs"])
+    db.expire_all()
+    for number, code in results.items():
+        if code is not None:
+            assert db.get(RoleJob, code).occupied_by == number
@@ -0,0 +1,41 @@
+from conftest import ROLE_CODE, seed_org
+from job import insert_jobs, next_job_number
+from models import RoleJob
+
+
+def job_rows(codes):
+    return [{"job_code": code, "job_name": "Officer", "role_code": ROLE_CODE, "job_status": True} for code in codes]
+
+
+def test_insert_jobs_counts_only_new_codes(db):
+    org = seed_org(db)
+    existing = org["jobs"][-2:]
+    new = [f"{ROLE_CODE}{str(i).zfill(4)}" for i in range(11, 14)]
+
+    created = insert_jobs(db, job_rows(existing + new))
+    db.commit()
+
+    assert created == len(new)
+    assert db.query(RoleJob).filter(RoleJob.job_code.in_(existing + new)).count() == len(existing + new)
+    assert insert_jobs(db, job_rows(new)) == 0
+
+
+def test_create_jobs_reports_skipped_collisions(client, db):
+    seed_org(db)
+    response = client.post("/jobs", json={
+        "role_code": ROLE_CODE, "job_name": "Officer", "prefix": ROLE_CODE, "start": 8, "count": 5
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    # 0008-0010 exist already, 0011 and 0012 are new
+    assert (body["created"], body["skipped"], body["start"]) == (2, 3, 8)
+
+
+def test_next_job_number_ignores_longer_prefixes(db):
+    seed_org(db)
+    insert_jobs(db, job_rows([f"{ROLE_CODE}KY0399", f"{ROLE_CODE}0042"]))
+    db.commit()
+
+    assert next_job_number(db, ROLE_CODE) == 43
+    assert next_job_number(db, f"{ROLE_CODE}KY") == 400
+    assert next_job_number(db, "LCSNEW") == 1
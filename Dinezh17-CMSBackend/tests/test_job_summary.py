@@ -0,0 +1,57 @@
+from conftest import MANAGER, ROLE_CODE, auth_header, seed_org
+from job import JOB_SUMMARY_COLUMNS, rebuild_job_summary
+from models import JobSummary
+
+
+def summary_rows(db):
+    db.expire_all()
+    return sorted(tuple(getattr(row, column.key) for column in JOB_SUMMARY_COLUMNS) for row in db.query(JobSummary))
+
+
+def assert_matches_rebuild(db):
+    """The incrementally maintained summary must equal one rebuilt from scratch."""
+    incremental = summary_rows(db)
+    rebuild_job_summary(db)
+    assert incremental == summary_rows(db)
+
+
+def test_summary_follows_job_creation(client, db):
+    seed_org(db)
+    response = client.post("/jobs", json={"role_code": ROLE_CODE, "job_name": "Analyst", "prefix": "LCSANL", "count": 5})
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+    assert (ROLE_CODE, "Analyst", 5, 0, "LCSANL0005") in summary_rows(db)
+
+
+def test_summary_follows_occupancy_changes(client, db):
+    org = seed_org(db)
+    admin = auth_header(MANAGER, "ADMIN")
+    response = client.post("/employees/", headers=admin, json={
+        "employee_number": "E0100",
+        "employee_name": "New starter",
+        "job_code": org["free_jobs"][0],
+        "reporting_to": MANAGER,
+        "role_id": org["role_id"],
+        "department_id": org["department_id"]
+    })
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+
+    response = client.post("/jobs/claim", headers=admin, json={"role_code": ROLE_CODE, "employee_number": "E0001"})
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+
+    response = client.delete("/employees/E0002", headers=admin)
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+
+
+def test_summary_follows_job_delete_and_deactivate(client, db):
+    org = seed_org(db)
+    response = client.request("DELETE", "/jobs", json={"role_code": ROLE_CODE, "job_name": "Officer", "count": 2})
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
+
+    response = client.put("/jobs/deactivate", json=org["free_jobs"][-1:])
+    assert response.status_code == 200, response.text
+    assert_matches_rebuild(db)
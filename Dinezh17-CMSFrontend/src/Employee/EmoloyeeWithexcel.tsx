@@ -18,6 +18,21 @@ interface ExcelUploadResponse {
   processed_employees: EmployeeData[];
 }
 
+interface ImportJob {
+  id: string;
+  status: "queued" | "running" | "completed" | "failed";
+  stage: string;
+  total_sheets: number | null;
+  parsed_sheets: number;
+  employees_to_import: number | null;
+  imported_employees: number;
+  error: string | null;
+  summary: ExcelUploadResponse["summary"] | null;
+  processed_employees: EmployeeData[] | null;
+}
+
+const IMPORT_POLL_INTERVAL_MS = 1000;
+
 const ExcelUploadDisplay: React.FC = () => {
   const [file, setFile] = useState<File | null>(null);
   const [uploadData, setUploadData] = useState<ExcelUploadResponse | null>(
@@ -25,6 +40,7 @@ const ExcelUploadDisplay: React.FC = () => {
   );
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [progress, setProgress] = useState<string | null>(null);
 
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     setError(null);
@@ -48,7 +64,7 @@ const ExcelUploadDisplay: React.FC = () => {
       const formData = new FormData();
       formData.append("file", file);
 
-      const response = await api.post<ExcelUploadResponse>(
+      const response = await api.post<{ job_id: string }>(
         "/employees/upload-employee-data/",
         formData,
         {
@@ -58,12 +74,37 @@ const ExcelUploadDisplay: React.FC = () => {
         }
       );
 
-      setUploadData(response.data);
+      // the import runs in the background, poll the job until it finishes
+      let job: ImportJob;
+      do {
+        await new Promise((resolve) =>
+          setTimeout(resolve, IMPORT_POLL_INTERVAL_MS)
+        );
+        job = (await api.get<ImportJob>(`/imports/${response.data.job_id}`))
+          .data;
+        setProgress(
+          job.stage === "importing"
+            ? `Importing ${job.imported_employees} / ${job.employees_to_import} employees`
+            : `Parsed ${job.parsed_sheets} / ${job.total_sheets ?? "?"} sheets`
+        );
+      } while (job.status === "queued" || job.status === "running");
+
+      if (job.status === "failed" || !job.summary || !job.processed_employees) {
+        setError(job.error || "Import failed. Please try again.");
+        return;
+      }
+
+      setUploadData({
+        status: job.status,
+        summary: job.summary,
+        processed_employees: job.processed_employees,
+      });
     } catch (err) {
       setError("Failed to upload file. Please try again.");
       console.error("Upload error:", err);
     } finally {
       setIsLoading(false);
+      setProgress(null);
     }
   };
 
@@ -92,7 +133,7 @@ const ExcelUploadDisplay: React.FC = () => {
               : "bg-green-500 hover:bg-green-600"
           }`}
         >
-          {isLoading ? "Uploading..." : "Upload Excel"}
+          {isLoading ? progress || "Uploading..." : "Upload Excel"}
         </button>
       </form>
 
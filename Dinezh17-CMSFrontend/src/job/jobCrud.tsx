@@ -100,6 +100,10 @@ const JobManagement: React.FC = () => {
   };
 
   const validateStart = (value: string) => {
+    // left blank, the server continues after the prefix's highest code
+    if (!value.trim()) {
+      return "";
+    }
     const numValue = Number(value);
     if (isNaN(numValue)) {
       return "Start must be a number";
@@ -125,7 +129,6 @@ const JobManagement: React.FC = () => {
       !formData.role_code.trim() ||
       !formData.job_name.trim() ||
       !formData.prefix.trim() ||
-      !formData.start.trim() ||
       !formData.count.trim()
     );
   };
@@ -161,12 +164,16 @@ const JobManagement: React.FC = () => {
         toast.info("Jobs added successfully");
       } else {
         // Create new jobs
-        await api.post("/jobs", {
+        const response = await api.post("/jobs", {
           ...formData,
-          start: parseInt(formData.start),
+          start: formData.start.trim() ? parseInt(formData.start) : null,
           count: parseInt(formData.count),
         });
-        toast.success("Jobs created successfully");
+        if (response.data.skipped) {
+          toast.warn(`${response.data.created} jobs created, ${response.data.skipped} codes already existed`);
+        } else {
+          toast.success("Jobs created successfully");
+        }
       }
       fetchJobs();
       closeModal();
@@ -205,14 +212,20 @@ const JobManagement: React.FC = () => {
     }
     if (window.confirm("Confirm deletion")) {
       try {
-        await api.delete("/jobs", {
+        const response = await api.delete("/jobs", {
           data: {
             job_name: currentJob.job_name,
             role_code: currentJob.role_code,
             count: countNum,
           },
         });
-        toast.warn("Jobs removed successfully");
+        if (response.data.blocked?.length) {
+          toast.warn(
+            `${response.data.deleted} jobs removed, ${response.data.blocked.length} still assigned to employees`
+          );
+        } else {
+          toast.warn("Jobs removed successfully");
+        }
         fetchJobs();
         closeDeleteModal();
       } catch (err: any) {
@@ -507,7 +520,7 @@ const JobManagement: React.FC = () => {
             )}
 
             <label className="block">
-              Starting Number <span className="text-red-500">*</span>
+              Starting Number
             </label>
             <input
               name="start"
@@ -516,7 +529,7 @@ const JobManagement: React.FC = () => {
               className={`w-full p-2 border border-gray-300 rounded mb-4 ${
                 editMode ? "bg-gray-100" : ""
               }`}
-              placeholder="Starting Number"
+              placeholder="Starting Number (blank to continue after the last code)"
               readOnly={editMode}
             />
             {errors.start && (